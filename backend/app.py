@@ -1,26 +1,129 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Request, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
+import re
+import threading
 from datetime import datetime
 import uuid
 from werkzeug.utils import secure_filename
 
 from services.ai_service import AIService
-from services.storage_service import StorageService
+from services.category_classifier import FALLBACK_CATEGORY
+from services.embedding_versions import EmbeddingVersions
+from services.inference_pool import InferencePool
+from services.image_ingest import canonicalize_image
+from services.janitor import TempJanitor
+from services.job_queue import JobQueue
+from services.model_registry import ModelBudgetExceeded, ModelRegistry, parse_model_spec
+from services.perceptual_hash import NearDuplicateIndex, dhash
+from services.retention import RetentionService
+from services.single_flight import SingleFlight
+from services.standing_queries import StandingQueryService
+from services import upload_validation
+from services.upload_validation import UploadRejected, ValidatingUploadStream
+from services.storage_service import StorageService, hash_file
 from services.vector_db_service import VectorDBService
 
+
+class ValidatingRequest(Request):
+    """Request that checks image uploads while werkzeug parses the body"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return ValidatingUploadStream(stream, MAX_IMAGE_PIXELS, MAX_IMAGE_SIDE)
+
+
 app = Flask(__name__)
+app.request_class = ValidatingRequest
 CORS(app)
 
 # Configuration
 UPLOAD_FOLDER = 'temp_uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+MAX_IMAGE_PIXELS = upload_validation.MAX_IMAGE_PIXELS  # MAX_IMAGE_PIXELS env, shared with PIL's limit
+MAX_IMAGE_SIDE = upload_validation.MAX_IMAGE_SIDE
+# Let a front server (nginx X-Sendfile/X-Accel) send upload bodies zero-copy
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '0') == '1'
+UPLOAD_CACHE_SECONDS = 365 * 24 * 3600  # Content-addressed files never change
+CANONICAL_MAX_SIDE = int(os.getenv('CANONICAL_MAX_SIDE', '1024'))
+MATCH_TOP_K = 10
+MATCH_MIN_SIMILARITY = 0.80  # 80% minimum - high quality matches only
+# Confidence needed before a predicted category narrows the search
+CATEGORY_CONFIDENCE = float(os.getenv('CATEGORY_CONFIDENCE', '0.6'))
+
+# Inference mode: 'local' runs CLIP in this process, 'pool' in worker processes
+INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'local').lower()
+INFERENCE_POOL_WORKERS = int(os.getenv('INFERENCE_POOL_WORKERS', '2'))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', '30'))
+
+# Model tiers, e.g. MODEL_REGISTRY="interactive=ViT-B/32:600,offline=ViT-L/14:2000" (tier=model:budget_mb)
+MODEL_TIERS, MODEL_BUDGETS_MB = parse_model_spec(os.getenv('MODEL_REGISTRY', ''))
+MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', '0'))  # All loaded models together, 0 = unlimited
+DEFAULT_TIERS = ('interactive', 'offline')  # Always accepted, fall back to the read model when not configured
+
+
+def load_encoder(model_name):
+    """Create the image encoder for a model (called lazily by the registry)"""
+    if INFERENCE_MODE == 'pool':
+        return InferencePool(num_workers=INFERENCE_POOL_WORKERS, timeout=INFERENCE_TIMEOUT, model_name=model_name)
+    return AIService(model_name)
+
 
 # Initialize services
-ai_service = AIService()
+# The read model is switched by reindex_embeddings.py; requests without a tier follow it
+embedding_versions = EmbeddingVersions(os.getenv('EMBEDDING_VERSIONS_DB', 'embedding_versions.sqlite3'))
+EMBEDDING_MODEL = embedding_versions.read_model()
+ai_service = ModelRegistry(
+    load_encoder,
+    default_model=embedding_versions.read_model,
+    tiers=MODEL_TIERS,
+    budgets_mb=MODEL_BUDGETS_MB,
+    total_budget_mb=MODEL_MEMORY_BUDGET_MB
+)
+ai_service.preload()  # Before gunicorn forks, so workers share the default model's memory
 storage_service = StorageService()
-vector_db_service = VectorDBService()
+vector_db_service = VectorDBService(EMBEDDING_MODEL)
+vector_dbs = {EMBEDDING_MODEL: vector_db_service}
+vector_dbs_lock = threading.Lock()
+job_queue = JobQueue(
+    db_path=os.getenv('JOB_QUEUE_DB', 'jobs.sqlite3'),
+    num_workers=int(os.getenv('JOB_QUEUE_WORKERS', '1')),
+    keep_finished=float(os.getenv('JOB_RETENTION_SECONDS', '86400'))
+)
+MAX_JOB_WAIT_SECONDS = 30
+temp_janitor = TempJanitor(
+    UPLOAD_FOLDER,
+    max_age_seconds=float(os.getenv('TEMP_MAX_AGE_SECONDS', '3600')),
+    quota_bytes=int(os.getenv('TEMP_QUOTA_MB', '1024')) * 1024 * 1024,
+    interval=float(os.getenv('TEMP_SWEEP_INTERVAL', '300')),
+    partial_dirs=(os.path.join(UPLOAD_FOLDER, 'objects'),),
+    min_evict_age_seconds=float(os.getenv('TEMP_MIN_EVICT_AGE_SECONDS', '300')),
+    # Images of matching jobs that haven't run yet
+    protected_paths=lambda: [job['file_path'] for job in job_queue.active_payloads() if job.get('file_path')]
+)
+
+
+def active_vector_db():
+    """Vector DB of the current read model - background services follow a cutover without a restart"""
+    return vector_db_for(ai_service.resolve())
+
+
+near_duplicate_index = NearDuplicateIndex(
+    active_vector_db,
+    max_distance=int(os.getenv('PHASH_MAX_DISTANCE', '4'))
+)
+retention_service = RetentionService(
+    active_vector_db,
+    max_age_days=float(os.getenv('RETENTION_DAYS', '0')),
+    interval=float(os.getenv('RETENTION_INTERVAL', '3600'))
+)
+match_flight = SingleFlight()  # Retried uploads share the in-flight matching
+standing_query_service = StandingQueryService(
+    active_vector_db,
+    db_path=os.getenv('MATCHES_DB', 'matches.sqlite3'),
+    min_similarity=MATCH_MIN_SIMILARITY
+)
 
 # Static posts database - matches seeded vector DB data
 posts_db = {
@@ -92,16 +195,288 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def with_image_variants(post):
+    """Add resized image URLs (thumbnail, card, full) for images in our storage"""
+    return {**post, 'image_variants': storage_service.get_variant_urls(post['image_url'])}
+
+
+def content_etag(filename):
+    """
+    Strong ETag for a content-addressed upload
+    
+    Files under objects/ are named by the SHA-256 of their bytes (plus a
+    variant suffix), so the name itself is a stable validator.
+    
+    Returns:
+        str: ETag value, or None for files that are not content-addressed
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    if filename.startswith('objects/') and re.fullmatch(r'[0-9a-f]{64}(_[a-z]+)?', stem):
+        return stem
+    return None
+
+
+def format_time_ago(created_at_iso):
+    """Format an ISO timestamp as a human readable 'x ago' string"""
+    created_at = datetime.fromisoformat(created_at_iso)
+    time_diff = datetime.now() - created_at
+    
+    if time_diff.days > 0:
+        return f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
+    elif time_diff.seconds >= 3600:
+        hours = time_diff.seconds // 3600
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    else:
+        minutes = time_diff.seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+
+
+def build_match_results(matches, category):
+    """
+    Join vector DB matches with post details for the API response
+    
+    Args:
+        matches (list): Matches returned by VectorDBService.search_similar
+        category (str): Category requested by the user ('' for any)
+    
+    Returns:
+        list: Match dictionaries in the format expected by the Flutter app
+    """
+    matching_results = []
+    print(f"📋 Processing {len(matches)} matches from vector DB...")
+    for match in matches:
+        print(f"   Checking match: post_id={match.get('post_id')}, similarity={match.get('similarity')*100:.1f}%")
+        match_post = posts_db.get(match['post_id'])
+        if match_post:
+            print(f"   Found in posts_db: {match_post['title']} (category: {match_post.get('category')}, type: {match_post['post_type']})")
+            # Double-check category matches if category was specified
+            if category and match_post.get('category', '').lower() != category.lower():
+                print(f"   ⚠️  Skipping {match_post['title']} - wrong category ({match_post.get('category')} vs {category})")
+                continue
+            
+            matching_results.append({
+                'id': match['post_id'],
+                'title': match_post['title'],
+                'description': match_post['description'],
+                'category': match_post['category'],
+                'location': match_post['location'],
+                'distance': '2km away',
+                'image_url': match_post['image_url'],
+                'image_variants': storage_service.get_variant_urls(match_post['image_url']),
+                'post_type': match_post['post_type'],
+                'match_percentage': round(match['similarity'] * 100, 1),
+                'time_ago': format_time_ago(match_post['created_at']),
+                'finder_name': 'User',
+                'is_verified': False
+            })
+            print(f"   ✅ Added to results: {match_post['title']}")
+        else:
+            print(f"   ❌ Post not found in posts_db: {match.get('post_id')}")
+    
+    return matching_results
+
+
+def vector_db_for(model_name):
+    """Vector DB holding one model's embeddings (shares the Qdrant client)"""
+    with vector_dbs_lock:
+        if model_name not in vector_dbs:
+            vector_dbs[model_name] = VectorDBService(model_name, client=vector_db_service.client)
+        return vector_dbs[model_name]
+
+
+def resolve_tier(requested, fallback):
+    """
+    Pick the model for a request from its tier
+    
+    Args:
+        requested (str): Tier sent by the client ('' for the default)
+        fallback (str): Tier used when none was sent ('interactive' or 'offline')
+    
+    Returns:
+        str: Model name (the read model while the tier's collection is still empty)
+    
+    Raises:
+        ValueError: If the client asked for an unknown tier
+    """
+    available = list(dict.fromkeys(DEFAULT_TIERS + tuple(MODEL_TIERS)))
+    if requested and requested not in available:
+        raise ValueError(f"Unknown tier '{requested}'. Available: {', '.join(available)}")
+    tier = requested or fallback
+    model_name = ai_service.resolve(tier if tier in MODEL_TIERS else None)
+    
+    # A tier's model searches its own collection - an empty one would just find nothing
+    read_model = ai_service.resolve()
+    if model_name != read_model and not vector_db_for(model_name).is_indexed():
+        print(f"⚠️  Tier '{tier}' uses {model_name}, whose collection is not indexed yet - using {read_model}")
+        return read_model
+    return model_name
+
+
+def lookup_duplicate_embedding(file_path, model_name=None):
+    """
+    Reuse the stored embedding of a near-identical image, if there is one
+    
+    Args:
+        file_path (str): Path to the canonical master
+        model_name (str, optional): Model whose embedding is needed (default read model)
+    
+    Returns:
+        np.ndarray: Stored embedding, or None if CLIP has to run
+    """
+    try:
+        duplicate = near_duplicate_index.find(dhash(file_path))
+        if duplicate is None:
+            return None
+        
+        point_id, distance = duplicate
+        # Point ids are the same in every model's collection
+        embedding = vector_db_for(model_name or ai_service.resolve()).get_embedding(point_id)
+        if embedding is not None:
+            print(f"🧬 Near-duplicate of {point_id} ({distance} bits apart) - reusing its embedding")
+        return embedding
+    except Exception as e:
+        # The pre-filter is only an optimization, CLIP remains the fallback
+        print(f"⚠️  Near-duplicate lookup failed: {e}")
+        return None
+
+
+def match_key(file_path, post_type, category, include_archive=False, model_name=None):
+    """Identity of a matching request: image content plus search filters"""
+    return hash_file(file_path), post_type, category.lower(), include_archive, model_name
+
+
+def find_matches(file_path, post_type, category, include_archive=False, model_name=None):
+    """
+    Embed an uploaded image and return formatted matches of the opposite type
+    
+    Identical requests that arrive while one is running share its result.
+    
+    Args:
+        file_path (str): Path to the uploaded image
+        post_type (str): 'lost' or 'found'
+        category (str): Category filter ('' for any)
+        include_archive (bool): Also search archived (expired/resolved) posts
+        model_name (str, optional): Model to embed and search with (default read model)
+    
+    Returns:
+        list: Match dictionaries in the format expected by the Flutter app
+    """
+    model_name = model_name or ai_service.resolve()
+    key = match_key(file_path, post_type, category, include_archive, model_name)
+    return match_flight.do(key, compute_matches, file_path, post_type, category, include_archive, model_name)
+
+
+def compute_matches(file_path, post_type, category, include_archive=False, model_name=None):
+    """Run the embedding and vector search behind find_matches"""
+    model_name = model_name or ai_service.resolve()
+    
+    # Re-posts of a known picture skip CLIP entirely
+    embedding = lookup_duplicate_embedding(file_path, model_name)
+    if embedding is None:
+        # Generate AI embedding for matching only
+        print(f"🤖 Generating AI embedding for matching...")
+        embedding = ai_service.generate_embedding(file_path, model_name)
+        print(f"✅ Embedding generated: {len(embedding)} dimensions ({model_name})")
+    
+    matches = search_matches(embedding, post_type, category, include_archive, model_name)
+    
+    # Format matches with full post details
+    return build_match_results(matches, category)
+
+
+def search_matches(embedding, post_type, category, include_archive=False, model_name=None):
+    """
+    Search the vector DB, narrowing to the predicted category when none was given
+    
+    Args:
+        embedding (np.ndarray): Query image embedding
+        post_type (str): 'lost' or 'found'
+        category (str): Category chosen by the user ('' for any)
+        include_archive (bool): Also search archived (expired/resolved) posts
+        model_name (str, optional): Model that produced the embedding (default read model)
+    
+    Returns:
+        list: Matches from VectorDBService.search_similar
+    """
+    model_name = model_name or ai_service.resolve()
+    vector_db = vector_db_for(model_name)
+    
+    search_category = category
+    if not category:
+        # Zero-shot guess - one small matrix product on the embedding we already have
+        prediction = ai_service.classify_category(embedding, model_name)
+        if prediction:
+            predicted, confidence = prediction
+            print(f"🏷️  Predicted category: {predicted} ({confidence*100:.1f}%)")
+            if confidence >= CATEGORY_CONFIDENCE and predicted != FALLBACK_CATEGORY:
+                search_category = predicted
+    
+    # Search for matches in existing static data with category filter
+    if search_category:
+        print(f"🔎 Searching for similar items in '{search_category}' category...")
+    else:
+        print(f"🔎 Searching for similar items in static database...")
+    
+    matches = vector_db.search_similar(
+        embedding=embedding,
+        post_type=post_type,
+        category=search_category if search_category else None,
+        top_k=MATCH_TOP_K,
+        min_similarity=MATCH_MIN_SIMILARITY,
+        include_archive=include_archive
+    )
+    
+    # A wrong guess must not hide matches - widen the search when it found nothing
+    if not matches and search_category != category:
+        print(f"🔎 No matches in predicted category, searching all categories...")
+        matches = vector_db.search_similar(
+            embedding=embedding,
+            post_type=post_type,
+            category=None,
+            top_k=MATCH_TOP_K,
+            min_similarity=MATCH_MIN_SIMILARITY,
+            include_archive=include_archive
+        )
+    
+    return matches
+
+
+def process_matching_job(payload):
+    """Job queue handler for queued matching requests"""
+    try:
+        matching_results = find_matches(
+            payload['file_path'],
+            payload['post_type'],
+            payload['category'],
+            payload.get('include_archive', False),
+            payload.get('model_name')
+        )
+        return {
+            'post_id': payload['post_id'],
+            'matches_count': len(matching_results),
+            'matches': matching_results
+        }
+    finally:
+        if os.path.exists(payload['file_path']):
+            os.remove(payload['file_path'])
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'ok',
         'message': 'Flask backend is running',
-        'ai_model': 'CLIP ViT-B/32',
+        'ai_model': f"CLIP {ai_service.resolve()}",
+        'models': ai_service.stats(),
         'device': ai_service.device,
         'vector_db': 'Qdrant (local)',
-        'total_posts': len(posts_db)
+        'total_posts': len(posts_db),
+        'inference_mode': INFERENCE_MODE,
+        'coalescing': match_flight.stats(),
+        'match_cache': vector_db_service.result_cache.stats(),
+        'temp_cleanup': temp_janitor.last_report,
+        'retention': retention_service.last_report
     }), 200
 
 
@@ -113,6 +488,8 @@ def create_post_with_matching():
     This endpoint now only performs AI matching against static data
     and returns demo results without actually creating any posts.
     """
+    file_path = None
+    queued = False
     try:
         print("\n" + "="*60)
         print("📥 Received matching request (static mode)")
@@ -129,9 +506,20 @@ def create_post_with_matching():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Allowed: png, jpg, jpeg, webp'}), 400
         
+        # Format and dimensions were checked from the first bytes as they arrived
+        file.stream.ensure_validated()
+        
         # Get form data
         post_type = request.form.get('type', 'lost').lower()
         category = request.form.get('category', '').strip()
+        # Archived (old or resolved) posts are only searched when asked for
+        include_archive = request.form.get('include_archive', '').lower() in ('1', 'true', 'yes')
+        # Interactive requests use the small model, queued ones may use the large one
+        is_async = request.form.get('mode', '').lower() == 'async'
+        try:
+            model_name = resolve_tier(request.form.get('tier', ''), 'offline' if is_async else 'interactive')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         print(f"📝 Post Details:")
         print(f"   Type: {post_type}")
@@ -146,75 +534,34 @@ def create_post_with_matching():
         file.save(file_path)
         print(f"💾 Saved temporary file: {filename}")
         
-        # Generate AI embedding for matching only
-        print(f"🤖 Generating AI embedding for matching...")
-        embedding = ai_service.generate_embedding(file_path)
-        print(f"✅ Embedding generated: {len(embedding)} dimensions")
-        
-        # Search for matches in existing static data with category filter
-        if category:
-            print(f"🔎 Searching for similar items in '{category}' category...")
-        else:
-            print(f"🔎 Searching for similar items in static database...")
+        # From here on everything works on one downscaled, orientation-corrected master
+        file_path = canonicalize_image(file_path, CANONICAL_MAX_SIDE)
         
-        matches = vector_db_service.search_similar(
-            embedding=embedding,
-            post_type=post_type,
-            category=category if category else None,
-            top_k=10,
-            min_similarity=0.80  # 80% minimum - high quality matches only
-        )
+        # Queue mode: return immediately, a background worker does the matching
+        if is_async:
+            job_id = job_queue.enqueue({
+                'post_id': post_id,
+                'file_path': file_path,
+                'post_type': post_type,
+                'category': category,
+                'include_archive': include_archive,
+                'model_name': model_name
+            })
+            queued = True
+            print(f"📬 Queued matching job: {job_id}")
+            return jsonify({
+                'success': True,
+                'post_id': post_id,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f"/api/jobs/{job_id}"
+            }), 202
         
-        # Format matches with full post details
-        matching_results = []
-        print(f"📋 Processing {len(matches)} matches from vector DB...")
-        for match in matches:
-            print(f"   Checking match: post_id={match.get('post_id')}, similarity={match.get('similarity')*100:.1f}%")
-            match_post = posts_db.get(match['post_id'])
-            if match_post:
-                print(f"   Found in posts_db: {match_post['title']} (category: {match_post.get('category')}, type: {match_post['post_type']})")
-                # Double-check category matches if category was specified
-                if category and match_post.get('category', '').lower() != category.lower():
-                    print(f"   ⚠️  Skipping {match_post['title']} - wrong category ({match_post.get('category')} vs {category})")
-                    continue
-                # Calculate time ago
-                created_at = datetime.fromisoformat(match_post['created_at'])
-                time_diff = datetime.now() - created_at
-                
-                if time_diff.days > 0:
-                    time_ago = f"{time_diff.days} day{'s' if time_diff.days > 1 else ''} ago"
-                elif time_diff.seconds >= 3600:
-                    hours = time_diff.seconds // 3600
-                    time_ago = f"{hours} hour{'s' if hours > 1 else ''} ago"
-                else:
-                    minutes = time_diff.seconds // 60
-                    time_ago = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-                
-                matching_results.append({
-                    'id': match['post_id'],
-                    'title': match_post['title'],
-                    'description': match_post['description'],
-                    'category': match_post['category'],
-                    'location': match_post['location'],
-                    'distance': '2km away',
-                    'image_url': match_post['image_url'],
-                    'post_type': match_post['post_type'],
-                    'match_percentage': round(match['similarity'] * 100, 1),
-                    'time_ago': time_ago,
-                    'finder_name': 'User',
-                    'is_verified': False
-                })
-                print(f"   ✅ Added to results: {match_post['title']}")
-            else:
-                print(f"   ❌ Post not found in posts_db: {match.get('post_id')}")
+        matching_results = find_matches(file_path, post_type, category, include_archive, model_name)
         
         print(f"✨ Returning {len(matching_results)} validated matches")
         print("="*60 + "\n")
         
-        # Clean up temp file
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
         return jsonify({
             'success': True,
             'post_id': post_id,
@@ -223,11 +570,53 @@ def create_post_with_matching():
             'matches': matching_results
         }), 201
         
+    except UploadRejected as e:
+        print(f"🚫 Upload rejected: {str(e)}")
+        return jsonify({'error': str(e)}), e.status_code
+    
+    except ModelBudgetExceeded as e:
+        # Busy models free up again - the client can retry
+        print(f"⏳ {str(e)}")
+        return jsonify({'error': str(e)}), 503
+    
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+    
+    finally:
+        # Clean up temp file on every path (queued jobs clean up after themselves)
+        if file_path and not queued and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status of a queued matching job
+    
+    Pass ?wait=<seconds> to long-poll until the job finishes.
+    """
+    wait = min(request.args.get('wait', 0, type=float), MAX_JOB_WAIT_SECONDS)
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
+@app.route('/api/posts/<post_id>/matches', methods=['GET'])
+def get_post_matches(post_id):
+    """Get matches recorded for a post by reverse matching of newer posts"""
+    if post_id not in posts_db:
+        return jsonify({'error': 'Post not found'}), 404
+    
+    matching_results = build_match_results(standing_query_service.get_matches(post_id), '')
+    return jsonify({
+        'post_id': post_id,
+        'matches_count': len(matching_results),
+        'matches': matching_results
+    }), 200
 
 
 @app.route('/api/posts/<post_id>', methods=['GET'])
@@ -236,7 +625,7 @@ def get_post(post_id):
     post = posts_db.get(post_id)
     if not post:
         return jsonify({'error': 'Post not found'}), 404
-    return jsonify(post), 200
+    return jsonify(with_image_variants(post)), 200
 @app.route('/', methods=['GET'])
 def start():
     """Base endpoint to verify API is running"""
@@ -245,7 +634,9 @@ def start():
         'endpoints': {
             '/api/health': 'Health check',
             '/api/posts/create-with-matching': 'Create post with AI matching (POST)',
+            '/api/jobs/<job_id>': 'Get queued matching job status (GET)',
             '/api/posts/<post_id>': 'Get post details by ID (GET)',
+            '/api/posts/<post_id>/matches': 'Get recorded matches for a post (GET)',
             '/api/posts': 'Get all posts with optional filters (GET)'
         }
     }), 200
@@ -267,15 +658,34 @@ def get_all_posts():
     posts.sort(key=lambda x: x['created_at'], reverse=True)
     
     return jsonify({
-        'posts': posts,
+        'posts': [with_image_variants(p) for p in posts],
         'count': len(posts)
     }), 200
 
 
-@app.route('/uploads/<filename>')
+@app.route('/uploads/<path:filename>')
 def serve_upload(filename):
-    """Serve uploaded files for local testing"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    """
+    Serve uploaded files
+    
+    Handles conditional GET (304) and byte ranges (206). Content-addressed
+    files get a strong ETag from their hash and are cached as immutable.
+    The body goes out through the server's wsgi.file_wrapper (sendfile
+    where supported) or X-Sendfile when USE_X_SENDFILE=1.
+    """
+    etag = content_etag(filename)
+    if etag is None:
+        return send_from_directory(UPLOAD_FOLDER, filename, conditional=True)
+    
+    response = send_from_directory(
+        UPLOAD_FOLDER,
+        filename,
+        etag=etag,
+        conditional=True,
+        max_age=UPLOAD_CACHE_SECONDS
+    )
+    response.headers['Cache-Control'] = f"public, max-age={UPLOAD_CACHE_SECONDS}, immutable"
+    return response
 
 
 if __name__ == '__main__':
@@ -283,9 +693,13 @@ if __name__ == '__main__':
     print("🚀 Lost & Found AI Backend")
     print("="*60)
     print(f"📍 Server: http://localhost:5000")
-    print(f"🤖 AI Model: CLIP ViT-B/32")
+    print(f"🤖 AI Model: CLIP {ai_service.resolve()}")
     print(f"💻 Device: {ai_service.device}")
     print(f"🗄️  Vector DB: Qdrant (local)")
     print("="*60 + "\n")
     
+    job_queue.start(process_matching_job)
+    temp_janitor.start()
+    retention_service.start()
+    storage_service.start()
     app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
@@ -0,0 +1,398 @@
+"""
+ASGI Entry Point - Async serving mode for the Lost & Found backend
+===================================================================
+Serves the same API as app.py, but request parsing and Qdrant I/O are
+awaited and CLIP inference runs on a bounded executor. When the executor
+is full, matching requests get a 503 instead of queueing without limit,
+so lightweight endpoints like /api/posts keep responding.
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import os
+import shutil
+import uuid
+
+from starlette.applications import Starlette
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from app import (
+    UPLOAD_FOLDER,
+    MAX_JOB_WAIT_SECONDS,
+    UPLOAD_CACHE_SECONDS,
+    MAX_IMAGE_PIXELS,
+    MAX_IMAGE_SIDE,
+    CANONICAL_MAX_SIDE,
+    app as flask_app,
+    ai_service,
+    vector_db_service,
+    job_queue,
+    temp_janitor,
+    retention_service,
+    storage_service,
+    standing_query_service,
+    posts_db,
+    allowed_file,
+    build_match_results,
+    content_etag,
+    lookup_duplicate_embedding,
+    match_key,
+    resolve_tier,
+    process_matching_job,
+    search_matches,
+    with_image_variants,
+)
+from services.image_ingest import canonicalize_image
+from services.inference_executor import InferenceExecutor, ExecutorSaturated
+from services.model_registry import ModelBudgetExceeded
+from services.single_flight import AsyncSingleFlight
+from services.upload_validation import UploadRejected, ValidatingUploadStream
+
+# Configuration
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '2'))
+INFERENCE_MAX_PENDING = int(os.getenv('INFERENCE_MAX_PENDING', '8'))
+RETRY_AFTER_SECONDS = 2
+
+inference_executor = InferenceExecutor(
+    max_workers=INFERENCE_WORKERS,
+    max_pending=INFERENCE_MAX_PENDING
+)
+match_flight = AsyncSingleFlight()  # Retried uploads share the in-flight matching
+
+
+def overloaded_response():
+    """503 response telling the client to retry later"""
+    return JSONResponse(
+        {'error': 'Server is busy processing images, please retry shortly'},
+        status_code=503,
+        headers={'Retry-After': str(RETRY_AFTER_SECONDS)}
+    )
+
+
+def save_upload(upload, file_path):
+    """Copy a spooled upload to disk (runs in a thread)"""
+    upload.file.seek(0)
+    with open(file_path, 'wb') as out:
+        shutil.copyfileobj(upload.file, out)
+
+
+class ValidatingMultiPartParser(MultiPartParser):
+    """Multipart parser that checks image uploads while the body streams in (see ValidatingRequest in app.py)"""
+
+    def on_headers_finished(self):
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is not None:
+            upload.file = ValidatingUploadStream(upload.file, MAX_IMAGE_PIXELS, MAX_IMAGE_SIDE)
+
+
+async def limited_body(request, max_bytes):
+    """Request body chunks, refusing bodies (chunked ones too) once they exceed max_bytes"""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadRejected('Upload too large', status_code=413)
+        yield chunk
+
+
+async def parse_upload_form(request):
+    """
+    Parse a multipart upload, rejecting bad images from their header as it arrives
+
+    Returns:
+        FormData: Fields and files (the caller closes it)
+
+    Raises:
+        UploadRejected: If the body is too large or an image fails validation
+    """
+    if not request.headers.get('content-type', '').startswith('multipart/form-data'):
+        raise UploadRejected('Expected a multipart/form-data upload', status_code=400)
+    body = limited_body(request, flask_app.config['MAX_CONTENT_LENGTH'])
+    try:
+        return await ValidatingMultiPartParser(request.headers, body).parse()
+    except MultiPartException as e:
+        raise UploadRejected(f"Invalid upload: {e}", status_code=400)
+
+
+async def start(request):
+    """Base endpoint to verify API is running"""
+    return JSONResponse({
+        'message': 'Lost & Found AI Backend is running (ASGI)',
+        'endpoints': {
+            '/api/health': 'Health check',
+            '/api/posts/create-with-matching': 'Create post with AI matching (POST)',
+            '/api/jobs/<job_id>': 'Get queued matching job status (GET)',
+            '/api/posts/<post_id>/matches': 'Get recorded matches for a post (GET)',
+            '/api/posts/<post_id>': 'Get post details by ID (GET)',
+            '/api/posts': 'Get all posts with optional filters (GET)'
+        }
+    })
+
+
+async def health_check(request):
+    """Health check endpoint - never touches the inference executor"""
+    return JSONResponse({
+        'status': 'ok',
+        'message': 'ASGI backend is running',
+        'ai_model': f"CLIP {ai_service.resolve()}",
+        'models': ai_service.stats(),
+        'device': ai_service.device,
+        'vector_db': 'Qdrant (local)',
+        'total_posts': len(posts_db),
+        'inference': inference_executor.stats(),
+        'coalescing': match_flight.stats(),
+        'match_cache': vector_db_service.result_cache.stats()
+    })
+
+
+async def compute_matches(file_path, post_type, category, include_archive, model_name):
+    """
+    Embed an upload and search for matches (shared by coalesced requests)
+
+    Owns file_path and removes it when done - the request that started it
+    may be cancelled while waiting requests still need the result.
+    """
+    try:
+        # Near-duplicates reuse a stored embedding, anything else goes to the bounded executor
+        embedding = await asyncio.to_thread(lookup_duplicate_embedding, file_path, model_name)
+        if embedding is None:
+            embedding = await inference_executor.run(ai_service.generate_embedding, file_path, model_name)
+
+        # Qdrant I/O is awaited off the event loop
+        matches = await asyncio.to_thread(search_matches, embedding, post_type, category, include_archive, model_name)
+
+        return build_match_results(matches, category)
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+async def create_post_with_matching(request):
+    """Async version of the static matching endpoint in app.py"""
+    # Fail fast before reading the upload body when inference is saturated
+    if inference_executor.is_saturated():
+        return overloaded_response()
+
+    # Refuse oversized bodies before reading them
+    content_length = int(request.headers.get('content-length') or 0)
+    if content_length > flask_app.config['MAX_CONTENT_LENGTH']:
+        return JSONResponse({'error': 'Upload too large'}, status_code=413)
+
+    file_path = None
+    form = None
+    handed_off = False  # The file belongs to a queued job or the shared matching task
+    try:
+        form = await parse_upload_form(request)
+
+        # Validate image file
+        file = form.get('image')
+        if file is None or isinstance(file, str):
+            return JSONResponse({'error': 'No image file provided'}, status_code=400)
+
+        if not file.filename:
+            return JSONResponse({'error': 'No selected file'}, status_code=400)
+
+        if not allowed_file(file.filename):
+            return JSONResponse({'error': 'Invalid file type. Allowed: png, jpg, jpeg, webp'}, status_code=400)
+
+        # Format and dimensions were checked from the header while it streamed in
+        file.file.ensure_validated()
+
+        # Get form data
+        post_type = form.get('type', 'lost').lower()
+        category = form.get('category', '').strip()
+        include_archive = form.get('include_archive', '').lower() in ('1', 'true', 'yes')
+        is_async = form.get('mode', '').lower() == 'async'
+        try:
+            model_name = await asyncio.to_thread(
+                resolve_tier, form.get('tier', ''), 'offline' if is_async else 'interactive'
+            )
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        # Save file temporarily
+        post_id = str(uuid.uuid4())
+        filename = secure_filename(f"{post_id}_{file.filename}")
+        file_path = os.path.join(UPLOAD_FOLDER, filename)
+        await asyncio.to_thread(save_upload, file, file_path)
+        file_path = await asyncio.to_thread(canonicalize_image, file_path, CANONICAL_MAX_SIDE)
+
+        # Queue mode: return immediately, a background worker does the matching
+        if is_async:
+            job_id = await asyncio.to_thread(job_queue.enqueue, {
+                'post_id': post_id,
+                'file_path': file_path,
+                'post_type': post_type,
+                'category': category,
+                'include_archive': include_archive,
+                'model_name': model_name
+            })
+            handed_off = True
+            return JSONResponse({
+                'success': True,
+                'post_id': post_id,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f"/api/jobs/{job_id}"
+            }, status_code=202)
+
+        # A retry of a request still in flight waits for its result instead of recomputing
+        key = await asyncio.to_thread(match_key, file_path, post_type, category, include_archive, model_name)
+
+        def start_matching():
+            # Only called when this request leads - a follower's own copy is removed below
+            nonlocal handed_off
+            handed_off = True
+            return compute_matches(file_path, post_type, category, include_archive, model_name)
+
+        matching_results = await match_flight.do(key, start_matching)
+
+        return JSONResponse({
+            'success': True,
+            'post_id': post_id,
+            'message': 'Post created successfully',
+            'matches_count': len(matching_results),
+            'matches': matching_results
+        }, status_code=201)
+
+    except ExecutorSaturated:
+        return overloaded_response()
+
+    except UploadRejected as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except ModelBudgetExceeded as e:
+        # Busy models free up again - the client can retry
+        return JSONResponse({'error': str(e)}, status_code=503, headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+    finally:
+        if form is not None:
+            await form.close()
+        if file_path and not handed_off and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+async def get_job(request):
+    """Get the status of a queued matching job (?wait=<seconds> to long-poll)"""
+    try:
+        wait = min(float(request.query_params.get('wait', 0)), MAX_JOB_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+    job_id = request.path_params['job_id']
+    if wait > 0:
+        job = await asyncio.to_thread(job_queue.wait, job_id, wait)
+    else:
+        job = await asyncio.to_thread(job_queue.get, job_id)
+    if not job:
+        return JSONResponse({'error': 'Job not found'}, status_code=404)
+    return JSONResponse(job)
+
+
+async def get_post_matches(request):
+    """Get matches recorded for a post by reverse matching of newer posts"""
+    post_id = request.path_params['post_id']
+    if post_id not in posts_db:
+        return JSONResponse({'error': 'Post not found'}, status_code=404)
+
+    matches = await asyncio.to_thread(standing_query_service.get_matches, post_id)
+    matching_results = build_match_results(matches, '')
+    return JSONResponse({
+        'post_id': post_id,
+        'matches_count': len(matching_results),
+        'matches': matching_results
+    })
+
+
+async def get_post(request):
+    """Get post details by ID"""
+    post = posts_db.get(request.path_params['post_id'])
+    if not post:
+        return JSONResponse({'error': 'Post not found'}, status_code=404)
+    return JSONResponse(with_image_variants(post))
+
+
+async def get_all_posts(request):
+    """Get all posts with optional filters"""
+    post_type = request.query_params.get('type')  # lost, found
+    category = request.query_params.get('category')
+
+    posts = list(posts_db.values())
+
+    # Apply filters
+    if post_type:
+        posts = [p for p in posts if p['post_type'] == post_type.lower()]
+    if category:
+        posts = [p for p in posts if p['category'].lower() == category.lower()]
+
+    # Sort by created_at (newest first)
+    posts.sort(key=lambda x: x['created_at'], reverse=True)
+
+    return JSONResponse({
+        'posts': [with_image_variants(p) for p in posts],
+        'count': len(posts)
+    })
+
+
+async def serve_upload(request):
+    """
+    Serve uploaded files
+
+    FileResponse handles byte ranges and uses zero-copy sending where the
+    server supports it. Content-addressed files get a strong ETag from their
+    hash, immutable caching and 304 replies to matching If-None-Match.
+    """
+    filename = request.path_params['filename']
+    file_path = safe_join(UPLOAD_FOLDER, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        return JSONResponse({'error': 'File not found'}, status_code=404)
+
+    etag = content_etag(filename)
+    if etag is None:
+        return FileResponse(file_path)
+
+    headers = {
+        'etag': f'"{etag}"',
+        'cache-control': f"public, max-age={UPLOAD_CACHE_SECONDS}, immutable"
+    }
+    if_none_match = request.headers.get('if-none-match', '')
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    if headers['etag'] in candidates or '*' in candidates:
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(file_path, headers=headers)
+
+
+app = Starlette(
+    routes=[
+        Route('/', start, methods=['GET']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/posts/create-with-matching', create_post_with_matching, methods=['POST']),
+        Route('/api/jobs/{job_id}', get_job, methods=['GET']),
+        Route('/api/posts/{post_id}/matches', get_post_matches, methods=['GET']),
+        Route('/api/posts/{post_id}', get_post, methods=['GET']),
+        Route('/api/posts', get_all_posts, methods=['GET']),
+        Route('/uploads/{filename:path}', serve_upload, methods=['GET']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    on_startup=[
+        lambda: job_queue.start(process_matching_job),
+        temp_janitor.start,
+        retention_service.start,
+        storage_service.start,
+    ],
+    on_shutdown=[lambda: inference_executor.shutdown(wait=False)]
+)
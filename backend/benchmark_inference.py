@@ -0,0 +1,75 @@
+"""
+Benchmark CLIP Image Inference
+==============================
+Times generate_embedding with the torch runtime options from the environment,
+so each option can be compared on its own:
+
+    TORCH_INFERENCE_MODE=false python benchmark_inference.py photo.jpg
+    TORCH_CHANNELS_LAST=true python benchmark_inference.py photo.jpg
+    TORCH_COMPILE=trace python benchmark_inference.py photo.jpg
+    TORCH_THREADS=4 TORCH_INTEROP_THREADS=1 python benchmark_inference.py photo.jpg
+
+Usage: python benchmark_inference.py IMAGE [IMAGE ...] [--runs 20] [--model ViT-B/32]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from services.ai_service import (
+    AIService, TORCH_CHANNELS_LAST, TORCH_COMPILE, TORCH_INFERENCE_MODE, TORCH_WARMUP
+)
+
+parser = argparse.ArgumentParser(description='Time CLIP image embeddings with the current runtime options')
+parser.add_argument('images', nargs='+', help='Images to embed')
+parser.add_argument('--runs', type=int, default=20, help='Timed passes over the images')
+parser.add_argument('--model', default=None, help='CLIP model (default CLIP_MODEL)')
+parser.add_argument('--save-baseline', action='store_true',
+                    help='Overwrite benchmark_baseline.npy with this run (written automatically only if missing)')
+args = parser.parse_args()
+
+print("=" * 60)
+print("⏱️  CLIP inference benchmark")
+print("=" * 60)
+print(f"inference_mode={TORCH_INFERENCE_MODE} channels_last={TORCH_CHANNELS_LAST} "
+      f"compile={TORCH_COMPILE} warmup={TORCH_WARMUP}")
+
+started = time.perf_counter()
+ai_service = AIService(args.model)
+print(f"🚀 Startup (load + optimize + warm-up): {time.perf_counter() - started:.1f}s")
+
+# The first call still pays for lazy initialization - report it separately
+started = time.perf_counter()
+reference = [ai_service.generate_embedding(path) for path in args.images]
+print(f"🥶 First pass: {(time.perf_counter() - started) * 1000 / len(args.images):.1f} ms/image")
+
+timings = []
+for _ in range(args.runs):
+    for path in args.images:
+        started = time.perf_counter()
+        ai_service.generate_embedding(path)
+        timings.append((time.perf_counter() - started) * 1000)
+
+timings = np.asarray(timings)
+print(f"🔥 {len(timings)} embeddings: mean {timings.mean():.1f} ms, "
+      f"p50 {np.percentile(timings, 50):.1f} ms, p95 {np.percentile(timings, 95):.1f} ms")
+
+# Optimizations must not change the result - compare against an eager float32 baseline if given
+reference = np.stack(reference)
+baseline_path = os.getenv('BENCHMARK_BASELINE')
+if baseline_path:
+    baseline = np.load(baseline_path)
+    if baseline.shape != reference.shape:
+        print(f"❌ {baseline_path} holds {baseline.shape} embeddings, this run produced {reference.shape} - "
+              f"use the same images (in the same order) and model")
+        exit(1)
+    drift = float(np.abs(baseline - reference).max())
+    print(f"🎯 Max difference from {baseline_path}: {drift:.2e}")
+elif args.save_baseline or not os.path.exists('benchmark_baseline.npy'):
+    np.save('benchmark_baseline.npy', reference)
+    print("💾 Embeddings saved to benchmark_baseline.npy (set BENCHMARK_BASELINE to compare later runs)")
+else:
+    print("ℹ️  benchmark_baseline.npy kept (--save-baseline overwrites it, BENCHMARK_BASELINE compares against it)")
+print("=" * 60)
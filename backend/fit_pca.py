@@ -0,0 +1,101 @@
+"""
+Fit a PCA Projection for Embedding Compression
+==============================================
+Fits a PCA projection on the stored embeddings of the read model and measures
+how much retrieval quality compression costs:
+
+1. Loads the stored full-size embeddings and holds out a random sample as queries
+2. Fits the projection on the rest and saves it (--output)
+3. Reports recall@k of the held-out queries - the share of their exact float32
+   nearest neighbours that float16, PCA and PCA + float16 vectors still find
+4. With --write, copies every post into the reduced collection
+   (e.g. lost_found_items_pca128), so EMBEDDING_PCA_PATH can be switched on
+
+Usage: python fit_pca.py 128 [--output embedding_pca.npz] [--holdout 500] [--k 10] [--write]
+       python fit_pca.py --evaluate embedding_pca.npz
+"""
+
+import argparse
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.embedding_codec import PCACodec, recall_at_k
+from services.embedding_versions import EmbeddingVersions
+from services.vector_db_service import VectorDBService
+
+parser = argparse.ArgumentParser(description='Fit and evaluate a PCA projection of the stored embeddings')
+parser.add_argument('dim', type=int, nargs='?', help='Dimensions to keep, e.g. 128')
+parser.add_argument('--output', default='embedding_pca.npz', help='Where to save the projection')
+parser.add_argument('--evaluate', metavar='PATH', help='Only measure an existing projection')
+parser.add_argument('--holdout', type=int, default=500, help='Held-out query embeddings')
+parser.add_argument('--k', type=int, default=10, help='Neighbours compared per query')
+parser.add_argument('--write', action='store_true', help='Copy all posts into the reduced collection')
+args = parser.parse_args()
+if not args.dim and not args.evaluate:
+    parser.error('give the number of dimensions or --evaluate PATH')
+
+
+def float16(vectors):
+    return np.asarray(vectors, dtype=np.float16)
+
+
+print("=" * 60)
+print("🗜️  Embedding compression")
+print("=" * 60)
+
+try:
+    model_name = EmbeddingVersions(os.getenv('EMBEDDING_VERSIONS_DB', 'embedding_versions.sqlite3')).read_model()
+    source = VectorDBService(model_name, pca_path='')  # Full-size vectors
+
+    vectors = np.asarray([vector for _, vector, _ in source.iter_points()], dtype=np.float32)
+    if len(vectors) < 2 * args.k:
+        print(f"\n⚠️  Only {len(vectors)} stored embeddings - not enough to fit or evaluate")
+        exit(1)
+
+    # Held-out queries are never seen by the fit
+    order = np.random.default_rng(0).permutation(len(vectors))
+    holdout = min(args.holdout, len(vectors) // 5)
+    queries, corpus = vectors[order[:holdout]], vectors[order[holdout:]]
+    print(f"\n📊 {len(vectors)} embeddings of {model_name} ({vectors.shape[1]}-d), {holdout} held out")
+
+    if args.evaluate:
+        codec = PCACodec.load(args.evaluate)
+        print(f"📂 Loaded {codec.dim}-d projection from {args.evaluate}")
+    else:
+        codec = PCACodec.fit(corpus, args.dim, model_name)
+        codec.save(args.output)
+        print(f"💾 Saved {codec.dim}-d projection to {args.output}")
+    print(f"   Variance kept on held-out data: {codec.explained_variance(queries) * 100:.1f}%")
+
+    print(f"\n🎯 Recall@{args.k} against exact float32 search:")
+    variants = {
+        'float16': float16,
+        f'pca{codec.dim}': codec.encode,
+        f'pca{codec.dim} + float16': lambda v: float16(codec.encode(v))
+    }
+    for name, encode in variants.items():
+        result = recall_at_k(queries, corpus, encode, k=args.k)
+        print(f"   {name:<18} recall {result['recall'] * 100:5.1f}%   similarity error {result['score_error']:.4f}")
+
+    if args.write:
+        target = VectorDBService(model_name, client=source.client, pca_path=args.evaluate or args.output)
+        print(f"\n📥 Writing reduced vectors to {target.collection_name}...")
+        for archived in (False, True):
+            points = list(source.iter_points(archived=archived))
+            for start in range(0, len(points), 256):
+                target.upsert_embeddings(points[start:start + 256], archived=archived)
+            print(f"   ✅ {len(points)} {'archived' if archived else 'live'} posts")
+        print(f"\n🔗 Set EMBEDDING_PCA_PATH={args.evaluate or args.output} to serve the reduced collection")
+
+    print("\n" + "=" * 60)
+
+except Exception as e:
+    print(f"\n❌ Compression failed: {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
@@ -0,0 +1,68 @@
+"""
+Pre-fork Production Server Configuration
+=========================================
+The master process imports app.py once (loading CLIP), then forks the
+workers. Model weights are never written after loading, so the workers
+share them copy-on-write instead of each holding its own ~350MB copy.
+Each worker gets cores // workers torch threads so the box is not
+oversubscribed.
+
+Run with:    gunicorn -c gunicorn.conf.py app:app
+ASGI mode:   SERVER_MODE=asgi gunicorn -c gunicorn.conf.py asgi:app
+
+Multiple workers need a Qdrant server (QDRANT_URL) - the local file
+storage in ./qdrant_data can only be opened by one process.
+"""
+
+import gc
+import os
+
+# Configuration
+cpu_count = os.cpu_count() or 1
+workers = int(os.getenv('WEB_WORKERS', '2'))
+threads_per_worker = int(os.getenv('TORCH_THREADS_PER_WORKER', max(1, cpu_count // workers)))
+interop_threads_per_worker = int(os.getenv('TORCH_INTEROP_THREADS', '1'))
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+preload_app = True  # Load CLIP once in the master before forking
+timeout = 120
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    worker_class = 'gthread'
+    threads = int(os.getenv('WEB_THREADS', '4'))
+
+
+def on_starting(server):
+    if workers > 1 and not os.getenv('QDRANT_URL'):
+        raise RuntimeError(
+            "Multiple workers need a shared Qdrant server: set QDRANT_URL "
+            "(local ./qdrant_data can only be opened by one process)"
+        )
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far (model included) out of the GC's reach.
+    # Otherwise collections in the workers touch object headers and
+    # un-share the copy-on-write pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import (
+        ai_service, vector_db_service, job_queue, process_matching_job, temp_janitor, retention_service,
+        storage_service,
+    )
+
+    if hasattr(ai_service, 'configure_threads'):
+        ai_service.configure_threads(threads_per_worker, inter_op_threads=interop_threads_per_worker)
+    if os.getenv('QDRANT_URL'):
+        # Do not share the master's HTTP connections across processes
+        vector_db_service.reconnect()
+    job_queue.start(process_matching_job)
+    temp_janitor.start()
+    retention_service.start()
+    storage_service.start()
+
+    server.log.info(f"Worker {worker.pid} ready with {threads_per_worker} torch threads")
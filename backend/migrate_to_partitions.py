@@ -0,0 +1,83 @@
+"""
+Migrate to Partitioned Collections
+===================================
+Copies every point of the single lost_found_items collection into one
+collection per (post_type, category), e.g. lost_found_items__found__wallet.
+Uses the same deployment as the app (QDRANT_URL, or local ./qdrant_data).
+The source collection is left untouched - set PARTITION_MODE=collections
+once the counts check out, and delete it afterwards if you like.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ['PARTITION_MODE'] = 'collections'
+
+from services.embedding_versions import EmbeddingVersions
+from services.vector_db_service import VectorDBService
+
+BATCH_SIZE = 256
+
+print("=" * 60)
+print("🔀 Migrating to Partitioned Collections")
+print("=" * 60)
+
+try:
+    vector_db = VectorDBService(EmbeddingVersions(os.getenv('EMBEDDING_VERSIONS_DB', 'embedding_versions.sqlite3')).read_model())
+    client = vector_db.client
+    source_name = vector_db.collection_name
+    
+    # Check if the single collection exists
+    collection_names = [col.name for col in client.get_collections().collections]
+    if source_name not in collection_names:
+        print(f"\n❌ Collection '{source_name}' not found")
+        print("Nothing to migrate!")
+        exit(0)
+    
+    source_info = client.get_collection(source_name)
+    print(f"\n📊 Source collection info:")
+    print(f"   Points: {source_info.points_count}")
+    
+    if source_info.points_count == 0:
+        print("\n⚠️  Source collection is empty - nothing to migrate")
+        exit(0)
+    
+    # Copy in pages, routing each point by its payload
+    print(f"\n📥 Copying points in batches of {BATCH_SIZE}...")
+    migrated = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source_name,
+            limit=BATCH_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        vector_db.upsert_embeddings([(point.id, point.vector, point.payload) for point in points], encoded=True)
+        migrated += len(points)
+        print(f"   ✅ {migrated}/{source_info.points_count}")
+        if offset is None:
+            break
+    
+    # Verify
+    info = vector_db.get_collection_info()
+    print(f"\n📊 Partitions:")
+    for name, count in info['partitions'].items():
+        print(f"   {name}: {count}")
+    
+    print("\n" + "=" * 60)
+    if info['points_count'] == source_info.points_count:
+        print("✅ Migration Complete!")
+    else:
+        print(f"⚠️  Point counts differ: {source_info.points_count} in source, {info['points_count']} in partitions")
+    print("=" * 60)
+    print("\n🔗 Set PARTITION_MODE=collections to route reads and writes to the partitions")
+    
+except Exception as e:
+    print(f"\n❌ Migration failed: {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
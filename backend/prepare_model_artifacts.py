@@ -0,0 +1,50 @@
+"""
+Prepare Offline CLIP Model Artifacts
+====================================
+Fills a directory with everything AIService needs to start without network
+access. Run it once on a machine that can reach the internet, then copy the
+directory to every node (or bake it into the image) and set CLIP_MODEL_DIR.
+
+For each model it writes:
+- the original checkpoint (e.g. ViT-B-32.pt), verified against OpenAI's checksum
+- an exported state dict (e.g. ViT-B-32.state_dict.pt) that CLIP_MODEL_MMAP=true
+  memory-maps, with its SHA-256 recorded in manifest.json
+
+Usage: python prepare_model_artifacts.py ViT-B/32 [ViT-L/14 ...] [--dir models] [--no-state-dict]
+"""
+
+import argparse
+import os
+
+from services.model_artifacts import ModelArtifactError, artifact_name, prepare, verify
+
+parser = argparse.ArgumentParser(description='Download and verify CLIP weights for offline nodes')
+parser.add_argument('models', nargs='+', help="CLIP models, e.g. 'ViT-B/32'")
+parser.add_argument('--dir', default=os.getenv('CLIP_MODEL_DIR') or 'models', help='Artifact directory')
+parser.add_argument('--no-state-dict', action='store_true', help='Skip the memory-mappable export')
+args = parser.parse_args()
+
+print("=" * 60)
+print(f"📦 Preparing CLIP artifacts in {os.path.abspath(args.dir)}")
+print("=" * 60)
+
+try:
+    for model_name in args.models:
+        artifact_name(model_name)  # Fail on typos before downloading anything
+        print(f"\n⬇️  {model_name}")
+        for path in prepare(model_name, args.dir, export_state_dict=not args.no_state_dict):
+            verify(model_name, path, args.dir)
+            print(f"   ✅ {os.path.basename(path)} ({os.path.getsize(path) / 1024 / 1024:.0f} MB, checksum ok)")
+
+    print("\n" + "=" * 60)
+    print(f"✅ Done - copy {args.dir}/ to the nodes and set CLIP_MODEL_DIR={os.path.abspath(args.dir)}")
+    print("=" * 60)
+
+except ModelArtifactError as e:
+    print(f"\n❌ {e}")
+    exit(1)
+except Exception as e:
+    print(f"\n❌ Preparing artifacts failed: {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
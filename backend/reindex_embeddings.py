@@ -0,0 +1,147 @@
+"""
+Re-index Embeddings for a New CLIP Model
+=========================================
+Upgrades the vector index to another CLIP model without downtime:
+
+1. Registers the new model for dual-writing (seed_static.py then embeds new
+   posts with both models)
+2. Walks every stored post in batches, re-embeds its image with the new
+   model and writes it to the new model's collection, throttled so serving
+   keeps its CPU; points already re-indexed are skipped, so it can resume
+3. With --switch, atomically makes the new model the read model once every
+   post is present (reload the app workers to pick it up)
+
+Usage: python reindex_embeddings.py ViT-L/14 [--batch-size 32] [--delay 1.0] [--switch]
+"""
+
+import argparse
+import os
+import time
+import uuid
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.ai_service import AIService
+from services.embedding_versions import EmbeddingVersions
+from services.image_ingest import canonicalize_image
+from services.vector_db_service import VectorDBService
+
+# URLs of images kept by the local storage backend map back to files
+LOCAL_UPLOADS_URL = 'http://localhost:5000/uploads/'
+LOCAL_UPLOADS_DIR = 'temp_uploads'
+TEMP_DIR = 'temp_uploads'
+
+parser = argparse.ArgumentParser(description='Re-embed stored posts with another CLIP model')
+parser.add_argument('model', help="Target CLIP model, e.g. 'ViT-L/14'")
+parser.add_argument('--batch-size', type=int, default=int(os.getenv('REINDEX_BATCH_SIZE', '32')))
+parser.add_argument('--delay', type=float, default=float(os.getenv('REINDEX_DELAY', '1.0')),
+                    help='Seconds to pause between batches')
+parser.add_argument('--threads', type=int, default=int(os.getenv('REINDEX_THREADS', '1')),
+                    help='Torch threads for the re-index (keep low next to a live server)')
+parser.add_argument('--switch', action='store_true', help='Switch reads to the new model when complete')
+args = parser.parse_args()
+
+
+def fetch_image(image_url):
+    """Download (or locate) a post's image into a temp file and canonicalize it"""
+    temp_path = os.path.join(TEMP_DIR, f"reindex_{uuid.uuid4().hex}.jpg")
+    if image_url.startswith(LOCAL_UPLOADS_URL):
+        local_path = os.path.join(LOCAL_UPLOADS_DIR, *image_url[len(LOCAL_UPLOADS_URL):].split('/'))
+        with open(local_path, 'rb') as src, open(temp_path, 'wb') as dst:
+            dst.write(src.read())
+    else:
+        response = requests.get(image_url, timeout=30)
+        response.raise_for_status()
+        with open(temp_path, 'wb') as f:
+            f.write(response.content)
+    return canonicalize_image(temp_path)
+
+
+print("=" * 60)
+print(f"🔁 Re-indexing embeddings with {args.model}")
+print("=" * 60)
+
+try:
+    versions = EmbeddingVersions(os.getenv('EMBEDDING_VERSIONS_DB', 'embedding_versions.sqlite3'))
+    source_model = versions.read_model()
+    if source_model == args.model:
+        print(f"\n✅ {args.model} is already the read model - nothing to do")
+        exit(0)
+
+    # New posts are written with both models from now on
+    versions.start_dual_write(args.model)
+    print(f"\n📝 Dual-writing {source_model} + {args.model}")
+
+    source = VectorDBService(source_model)
+    target = VectorDBService(args.model, client=source.client)
+
+    ai_service = AIService(args.model)
+    ai_service.configure_threads(args.threads)
+
+    # Everything already in the target collection is skipped (resumable)
+    done = {point_id for point_id, _ in target.iter_payloads(['post_id'])}
+    done |= {point_id for point_id, _ in target.iter_payloads(['post_id'], archived=True)}
+
+    pending = [(point_id, payload, False) for point_id, payload in source.iter_payloads(None)]
+    pending += [(point_id, payload, True) for point_id, payload in source.iter_payloads(None, archived=True)]
+    total = len(pending)
+    pending = [item for item in pending if item[0] not in done]
+    print(f"📊 {total} posts, {total - len(pending)} already re-indexed, {len(pending)} to go")
+
+    started = time.time()
+    failed = 0
+    for start in range(0, len(pending), args.batch_size):
+        batch = pending[start:start + args.batch_size]
+        hot, archived = [], []
+        for point_id, payload, is_archived in batch:
+            image_path = None
+            try:
+                image_path = fetch_image(payload['image_url'])
+                embedding = ai_service.generate_embedding(image_path)
+                (archived if is_archived else hot).append((point_id, embedding, payload))
+            except Exception as e:
+                failed += 1
+                print(f"   ❌ {payload.get('post_id', point_id)}: {e}")
+            finally:
+                if image_path and os.path.exists(image_path):
+                    os.remove(image_path)
+
+        if hot:
+            target.upsert_embeddings(hot)
+        if archived:
+            target.upsert_embeddings(archived, archived=True)
+
+        # Progress with throughput and an estimate for the rest
+        processed = start + len(batch)
+        rate = processed / (time.time() - started)
+        eta = (len(pending) - processed) / rate if rate else 0
+        print(f"   ✅ {processed}/{len(pending)} ({rate:.1f} posts/s, ~{eta:.0f}s left)")
+
+        # Throttle - leave CPU to the live server between batches
+        time.sleep(args.delay)
+
+    print("\n" + "=" * 60)
+    if failed:
+        print(f"⚠️  {failed} posts failed - re-run to retry them, reads stay on {source_model}")
+        print("=" * 60)
+        exit(1)
+
+    print(f"✅ Re-index complete: {total} posts embedded with {args.model}")
+    print("=" * 60)
+
+    if args.switch:
+        versions.switch_reads(args.model)
+        print(f"\n🔀 Reads switched to {args.model} ({source_model} retired, collection kept for rollback)")
+        print("🔄 Reload the app workers (e.g. kill -HUP <gunicorn pid>) to serve the new model")
+    else:
+        print(f"\n💡 Run again with --switch to make {args.model} the read model")
+
+except Exception as e:
+    print(f"\n❌ Re-index failed: {e}")
+    import traceback
+    traceback.print_exc()
+    exit(1)
@@ -7,18 +7,30 @@ Creates embeddings for the 5 static posts using fixed IDs
 import sys
 import os
 import uuid
+from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.ai_service import AIService
 from services.vector_db_service import VectorDBService
+from services.embedding_versions import EmbeddingVersions
+from services.standing_queries import StandingQueryService
+from services.image_ingest import canonicalize_image
+from services.perceptual_hash import dhash
 import requests
 from PIL import Image
 import io
 
 # Initialize services
 print("🚀 Initializing AI and Vector DB services...")
-ai_service = AIService()
-vector_db = VectorDBService()
+# During a model upgrade every post is written with the read model and the new one
+write_models = EmbeddingVersions(os.getenv('EMBEDDING_VERSIONS_DB', 'embedding_versions.sqlite3')).write_models()
+ai_service = AIService(write_models[0])
+vector_db = VectorDBService(write_models[0])
+dual_writes = [
+    (AIService(model_name), VectorDBService(model_name, client=vector_db.client))
+    for model_name in write_models[1:]
+]
+standing_queries = StandingQueryService(vector_db, db_path=os.getenv('MATCHES_DB', 'matches.sqlite3'))
 
 # Static posts with Unsplash images - use UUID strings
 STATIC_POSTS = [
@@ -73,6 +85,7 @@ print("\n" + "="*60)
 print("🌱 SEEDING VECTOR DB WITH STATIC POSTS")
 print("="*60 + "\n")
 
+inserted = []
 for i, post in enumerate(STATIC_POSTS, 1):
     print(f"[{i}/{len(STATIC_POSTS)}] {post['title']} ({post['type'].upper()})")
     
@@ -89,28 +102,43 @@ for i, post in enumerate(STATIC_POSTS, 1):
         temp_file = f"temp_{post['id']}.jpg"
         with open(temp_file, 'wb') as f:
             f.write(response.content)
+        temp_file = canonicalize_image(temp_file)
         
         # Generate embedding
         print(f"   🤖 Generating CLIP embedding...")
         embedding = ai_service.generate_embedding(temp_file)
         print(f"   ✅ Embedding: {len(embedding)} dimensions")
         
+        payload = {
+            'post_id': post['key'],  # Use key for post_db lookup
+            'post_type': post['type'],
+            'category': post['category'],
+            'location': post['location'],
+            'title': post['title'],
+            'image_url': post['image_url'],
+            'phash': dhash(temp_file),  # Near-duplicate lookup before CLIP
+            'status': 'active',
+            'created_at': datetime.now().isoformat()  # Retention window starts at indexing
+        }
+        
         # Store in vector DB
         print(f"   💾 Storing in vector database...")
         vector_db.upsert_embedding(
             point_id=post['id'],  # UUID string
             embedding=embedding,
-            payload={
-                'post_id': post['key'],  # Use key for post_db lookup
-                'post_type': post['type'],
-                'category': post['category'],
-                'location': post['location'],
-                'title': post['title'],
-                'image_url': post['image_url']
-            }
+            payload=payload
         )
+        for dual_ai_service, dual_vector_db in dual_writes:
+            print(f"   🔁 Dual-writing {dual_ai_service.model_name} embedding...")
+            dual_vector_db.upsert_embedding(post['id'], dual_ai_service.generate_embedding(temp_file), payload)
         print(f"   ✅ Stored with vector ID: {post['id'][:8]}...")
         print(f"   ✅ Post lookup key: {post['key']}")
+        inserted.append({
+            'post_id': post['key'],
+            'embedding': embedding,
+            'post_type': post['type'],
+            'category': post['category']
+        })
         
         # Clean up
         if os.path.exists(temp_file):
@@ -122,6 +150,11 @@ for i, post in enumerate(STATIC_POSTS, 1):
         print(f"   ❌ Error: {e}")
         print()
 
+# Reverse-match all new posts against open posts in one batch
+new_pairs = standing_queries.on_insert(inserted)
+for pair in new_pairs:
+    print(f"   🔗 {pair['lost_post_id']} ↔ {pair['found_post_id']} ({pair['similarity']*100:.1f}%)")
+
 # Show results
 print("="*60)
 print("📊 SEEDING COMPLETE!")
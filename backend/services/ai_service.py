@@ -2,46 +2,209 @@
 AI Service - Handles image embedding generation using CLIP model
 """
 
+import os
+
+import numpy as np
 import torch
 from PIL import Image
 import clip
 
+from services.category_classifier import CATEGORY_PROMPTS, ZeroShotClassifier
+from services.embedding_versions import DEFAULT_MODEL
+from services.model_artifacts import load_clip
+from services.upload_validation import MAX_IMAGE_PIXELS
+
+# PIL refuses to decode anything over twice this (decompression bomb guard)
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+# CPU runtime options - each can be toggled separately to benchmark it
+TORCH_INFERENCE_MODE = os.getenv('TORCH_INFERENCE_MODE', 'true').lower() == 'true'  # inference_mode instead of no_grad
+TORCH_CHANNELS_LAST = os.getenv('TORCH_CHANNELS_LAST', 'false').lower() == 'true'  # NHWC layout for the convolutions
+TORCH_COMPILE = os.getenv('TORCH_COMPILE', 'none').lower()  # 'none', 'compile' (torch.compile) or 'trace' (TorchScript)
+TORCH_WARMUP = int(os.getenv('TORCH_WARMUP', '0' if TORCH_COMPILE == 'none' else '2'))  # Dummy passes at startup
+TORCH_THREADS = int(os.getenv('TORCH_THREADS', '0'))  # Intra-op threads, 0 = torch default
+TORCH_INTEROP_THREADS = int(os.getenv('TORCH_INTEROP_THREADS', '0'))
+
 
 class AIService:
-    def __init__(self):
-        """Initialize CLIP model for image embeddings"""
+    def __init__(self, model_name=None):
+        """
+        Initialize CLIP model for image embeddings
+        
+        Args:
+            model_name (str, optional): CLIP variant to load (default CLIP_MODEL, 'ViT-B/32')
+        """
+        self.model_name = model_name or DEFAULT_MODEL
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"🤖 Loading CLIP model on {self.device}...")
+        print(f"🤖 Loading CLIP model {self.model_name} on {self.device}...")
+        
+        # Thread pools have to be sized before the first parallel operator runs
+        if TORCH_THREADS or TORCH_INTEROP_THREADS:
+            self.configure_threads(TORCH_THREADS or None, TORCH_INTEROP_THREADS or None)
         
-        # Load pretrained CLIP model
-        self.model, self.preprocess = clip.load("ViT-B/32", device=self.device)
+        # Load pretrained CLIP model (from CLIP_MODEL_DIR when set, never downloading then)
+        self.model, self.preprocess = load_clip(self.model_name, self.device)
         self.model.eval()  # Set to evaluation mode
+        self.embedding_dim = self.model.visual.output_dim
+        self.input_resolution = self.model.visual.input_resolution
+        
+        self.channels_last = TORCH_CHANNELS_LAST
+        if self.channels_last:
+            self.model.visual = self.model.visual.to(memory_format=torch.channels_last)
+        self._optimize_image_encoder(TORCH_COMPILE)
+        self.warmup(TORCH_WARMUP)
+        
+        # Text side of zero-shot classification, computed once per process
+        self.category_classifier = ZeroShotClassifier(
+            list(CATEGORY_PROMPTS),
+            self.encode_category_prompts()
+        )
         
         print(f"✅ CLIP model loaded successfully")
     
+    def _inference(self):
+        """Context for running the model (inference_mode skips autograd bookkeeping entirely)"""
+        return torch.inference_mode() if TORCH_INFERENCE_MODE else torch.no_grad()
+    
+    def _example_input(self):
+        """A blank preprocessed image, used for tracing and warm-up"""
+        image_input = torch.zeros(1, 3, self.input_resolution, self.input_resolution, device=self.device)
+        image_input = image_input.type(self.model.dtype)
+        return image_input.to(memory_format=torch.channels_last) if self.channels_last else image_input
+    
+    def _optimize_image_encoder(self, mode):
+        """
+        Replace the image encoder with a compiled or traced graph
+        
+        Args:
+            mode (str): 'compile' (torch.compile), 'trace' (TorchScript) or 'none'
+        """
+        if mode == 'none':
+            return
+        try:
+            if mode == 'compile':
+                self.model.visual = torch.compile(self.model.visual)
+            elif mode == 'trace':
+                # Traced outside inference_mode - tensors created under it can't be saved in a graph.
+                # Not frozen: CLIP reads the encoder's conv1 weight dtype, which freezing would inline.
+                with torch.no_grad():
+                    self.model.visual = torch.jit.trace(self.model.visual, self._example_input())
+            else:
+                raise ValueError(f"Unknown TORCH_COMPILE mode '{mode}'")
+            print(f"⚙️  Image encoder optimized with {mode}")
+        except Exception as e:
+            # Eager execution still works, just slower
+            print(f"⚠️  Could not {mode} the image encoder, running eagerly: {e}")
+    
+    def warmup(self, runs=1):
+        """
+        Run dummy images through the encoder
+        
+        Compiled and traced graphs are built or specialized on the first calls,
+        so this moves that cost from the first user request to startup.
+        
+        Args:
+            runs (int): Forward passes to run
+        """
+        if runs <= 0:
+            return
+        try:
+            with self._inference():
+                for _ in range(runs):
+                    self.model.encode_image(self._example_input())
+        except Exception as e:
+            # torch.compile only fails once it is first called
+            eager = getattr(self.model.visual, '_orig_mod', None)
+            if eager is None:
+                raise
+            print(f"⚠️  Compiled image encoder failed, running eagerly: {e}")
+            self.model.visual = eager
+        print(f"🔥 Warmed up the image encoder ({runs} runs)")
+    
+    def encode_category_prompts(self):
+        """
+        Embed the category prompts (mean of each category's prompts)
+        
+        Returns:
+            numpy.ndarray: One unit-length text embedding per category
+        """
+        category_embeddings = []
+        with self._inference():
+            for prompts in CATEGORY_PROMPTS.values():
+                text_features = self.model.encode_text(clip.tokenize(prompts).to(self.device)).float()
+                text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+                mean = text_features.mean(dim=0)
+                category_embeddings.append(mean / mean.norm())
+        return torch.stack(category_embeddings).cpu().numpy()
+    
+    def classify_category(self, embedding):
+        """
+        Predict the item category from an image embedding (zero-shot)
+        
+        Args:
+            embedding (np.ndarray): Image embedding from generate_embedding
+        
+        Returns:
+            tuple: (category, confidence)
+        """
+        return self.category_classifier.classify(embedding)
+    
+    def memory_bytes(self):
+        """Approximate memory held by the model weights and buffers"""
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    
+    def close(self):
+        """Release the model (used by the model registry when unloading)"""
+        self.model = None
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+    
+    def configure_threads(self, intra_op_threads, inter_op_threads=None):
+        """
+        Set torch thread pool sizes for this process
+        
+        Used by the pre-fork launcher so that workers * threads == cores.
+        
+        Args:
+            intra_op_threads (int, optional): Threads used inside a single operator (None keeps the current)
+            inter_op_threads (int, optional): Threads running operators in parallel
+        """
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if inter_op_threads:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError as e:
+                # Can only be set before any inter-op parallel work has started
+                print(f"⚠️  Could not set inter-op threads: {e}")
+        print(f"🧵 Torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+    
     def generate_embedding(self, image_path):
         """
-        Generate 512-dimensional embedding vector for an image
+        Generate the embedding vector for an image
         
         Args:
             image_path (str): Path to image file
         
         Returns:
-            list: 512-dimensional embedding vector
+            np.ndarray: float32 embedding vector (512 dimensions for ViT-B/32)
         """
         try:
             # Load and preprocess image
             image = Image.open(image_path).convert('RGB')
             image_input = self.preprocess(image).unsqueeze(0).to(self.device)
+            if self.channels_last:
+                image_input = image_input.to(memory_format=torch.channels_last)
             
             # Generate embedding
-            with torch.no_grad():
+            with self._inference():
                 image_features = self.model.encode_image(image_input)
                 # Normalize to unit length for cosine similarity
                 image_features = image_features / image_features.norm(dim=-1, keepdim=True)
             
-            # Convert to list
-            embedding = image_features.cpu().numpy().flatten().tolist()
+            # Keep it as a float32 array - lists are only built when sending it to Qdrant
+            embedding = image_features[0].float().cpu().numpy()
             
             return embedding
             
@@ -53,16 +216,14 @@ class AIService:
         Compute cosine similarity between two embeddings
         
         Args:
-            embedding1 (list): First embedding vector
-            embedding2 (list): Second embedding vector
+            embedding1 (np.ndarray): First embedding vector
+            embedding2 (np.ndarray): Second embedding vector
         
         Returns:
             float: Similarity score (0-1)
         """
-        import numpy as np
-        
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        vec1 = np.asarray(embedding1, dtype=np.float32)
+        vec2 = np.asarray(embedding2, dtype=np.float32)
         
         # Cosine similarity
         similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
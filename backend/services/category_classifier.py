@@ -0,0 +1,60 @@
+"""
+Category Classifier - Zero-shot item categories from CLIP embeddings
+
+Each category is described by a few text prompts whose CLIP text embeddings
+are computed once when the model loads. Classifying an image is then a
+single small matrix product against its (already computed) embedding.
+"""
+
+import numpy as np
+
+# Categories offered by the app, with the prompts that describe them
+CATEGORY_PROMPTS = {
+    'Wallet': ['a photo of a wallet', 'a photo of a purse', 'a photo of a card holder'],
+    'Phone': ['a photo of a mobile phone', 'a photo of a smartphone in a case'],
+    'Keys': ['a photo of keys', 'a photo of a keychain'],
+    'Bag': ['a photo of a bag', 'a photo of a backpack', 'a photo of a handbag'],
+    'Electronics': ['a photo of headphones', 'a photo of a laptop', 'a photo of an electronic device'],
+    'Documents': ['a photo of an ID card', 'a photo of a passport', 'a photo of documents'],
+    'Jewelry': ['a photo of jewelry', 'a photo of a ring', 'a photo of a necklace', 'a photo of a watch'],
+    'Clothing': ['a photo of clothing', 'a photo of a jacket', 'a photo of a scarf'],
+    'Other': ['a photo of a toy', 'a photo of an umbrella', 'a photo of an object']
+}
+
+# Catch-all category - predicting it never narrows the search
+FALLBACK_CATEGORY = 'Other'
+
+# CLIP's learned temperature for image-text logits
+LOGIT_SCALE = 100.0
+
+
+class ZeroShotClassifier:
+    def __init__(self, categories, text_embeddings, logit_scale=LOGIT_SCALE):
+        """
+        Initialize the classifier
+
+        Args:
+            categories (list): Category names
+            text_embeddings (array-like): One unit-length text embedding per category
+            logit_scale (float): Temperature applied before the softmax
+        """
+        self.categories = list(categories)
+        self.text_embeddings = np.asarray(text_embeddings, dtype=np.float32)
+        self.logit_scale = logit_scale
+
+    def classify(self, embedding):
+        """
+        Predict the category of an image
+
+        Args:
+            embedding (np.ndarray): Unit-length image embedding
+
+        Returns:
+            tuple: (category, confidence) with confidence in 0-1
+        """
+        logits = self.logit_scale * (self.text_embeddings @ np.asarray(embedding, dtype=np.float32))
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+
+        best = int(probabilities.argmax())
+        return self.categories[best], float(probabilities[best])
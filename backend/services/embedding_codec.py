@@ -0,0 +1,132 @@
+"""
+Embedding Codec - Optional PCA projection of embeddings to fewer dimensions
+
+The projection is fit offline on stored embeddings (see fit_pca.py) and saved
+as an .npz file. It is applied to every vector before it is written and to
+every query before it is searched, so both sides live in the same reduced
+space. Reduced vectors are re-normalized, so cosine similarity still works.
+"""
+
+import numpy as np
+
+
+class PCACodec:
+    def __init__(self, mean, components, model_name=None):
+        """
+        Initialize the codec
+
+        Args:
+            mean (array-like): Mean embedding of the training data
+            components (array-like): Orthonormal principal axes, one per row
+            model_name (str, optional): CLIP model the projection was fit for
+        """
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.model_name = model_name
+
+    @property
+    def dim(self):
+        """Number of dimensions after the projection"""
+        return self.components.shape[0]
+
+    @property
+    def input_dim(self):
+        return self.components.shape[1]
+
+    def encode(self, embeddings):
+        """
+        Project embeddings into the reduced space
+
+        Args:
+            embeddings (array-like): One embedding or a matrix with one per row
+
+        Returns:
+            np.ndarray: Unit-length float32 vectors with `dim` values each
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        projected = (vectors - self.mean) @ self.components.T
+        norms = np.linalg.norm(projected, axis=-1, keepdims=True)
+        return projected / np.maximum(norms, 1e-12)
+
+    def decode(self, embeddings):
+        """
+        Map reduced vectors back to the model's space (approximately)
+
+        Encoding the result again gives (almost exactly) the same reduced
+        vector, so a decoded embedding can be used as a query or for the
+        category classifier.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        restored = vectors @ self.components + self.mean
+        return restored / np.maximum(np.linalg.norm(restored, axis=-1, keepdims=True), 1e-12)
+
+    def save(self, path):
+        np.savez(path, mean=self.mean, components=self.components, model_name=self.model_name or '')
+
+    @classmethod
+    def load(cls, path):
+        """Load a codec saved by save()"""
+        with np.load(path) as data:
+            return cls(data['mean'], data['components'], str(data['model_name']) or None)
+
+    @classmethod
+    def fit(cls, embeddings, dim, model_name=None):
+        """
+        Fit the projection on a sample of embeddings
+
+        Args:
+            embeddings (array-like): Training embeddings, one per row
+            dim (int): Number of principal components to keep
+            model_name (str, optional): CLIP model that produced the embeddings
+
+        Returns:
+            PCACodec: The fitted codec
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if dim > min(vectors.shape):
+            raise ValueError(f"Cannot keep {dim} components from {vectors.shape[0]} x {vectors.shape[1]} embeddings")
+        mean = vectors.mean(axis=0)
+        # Rows of vt are the principal axes, strongest first
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls(mean, vt[:dim], model_name)
+
+    def explained_variance(self, embeddings):
+        """Share of the embeddings' variance kept by the projection (0-1)"""
+        centered = np.asarray(embeddings, dtype=np.float32) - self.mean
+        kept = ((centered @ self.components.T) ** 2).sum()
+        return float(kept / (centered ** 2).sum())
+
+
+def recall_at_k(queries, corpus, encode, k=10):
+    """
+    How many of the exact top-k neighbours survive compression
+
+    Neighbours are found by exact float32 cosine similarity, then again with
+    `encode` applied to both queries and corpus. Recall is the share of the
+    exact neighbours the compressed search also returns.
+
+    Args:
+        queries (array-like): Held-out query embeddings, one per row
+        corpus (array-like): Stored embeddings to search, one per row
+        encode (callable): Compression to evaluate (matrix in, matrix out)
+        k (int): Neighbours per query
+
+    Returns:
+        dict: recall@k and the mean absolute similarity error on the exact neighbours
+    """
+    def normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    queries, corpus = normalize(queries), normalize(corpus)
+    k = min(k, len(corpus))
+    exact_scores = queries @ corpus.T
+    exact = np.argsort(-exact_scores, axis=1)[:, :k]
+
+    compressed_scores = normalize(encode(queries)) @ normalize(encode(corpus)).T
+    approx = np.argsort(-compressed_scores, axis=1)[:, :k]
+
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact, approx))
+    rows = np.arange(len(queries))[:, None]
+    score_error = np.abs(exact_scores[rows, exact] - compressed_scores[rows, exact]).mean()
+    return {'recall': hits / (len(queries) * k), 'score_error': float(score_error), 'k': k}
@@ -0,0 +1,151 @@
+"""
+Embedding Versions - Which CLIP model's embeddings are read and written
+
+Every model version gets its own collection, and every point is tagged with
+the model that produced it. Upgrading a model is a dual-write period (new
+posts are embedded with both models), a background re-index of the stored
+posts, then an atomic switch of the read model. The roles are kept in SQLite
+so every worker process sees the switch at once.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_MODEL = os.getenv('CLIP_MODEL', 'ViT-B/32')
+
+# Output size of each CLIP image encoder
+EMBEDDING_DIMS = {
+    'RN50': 1024,
+    'RN101': 512,
+    'RN50x4': 640,
+    'RN50x16': 768,
+    'RN50x64': 1024,
+    'ViT-B/32': 512,
+    'ViT-B/16': 512,
+    'ViT-L/14': 768,
+    'ViT-L/14@336px': 768
+}
+
+# The collection that existed before versioning keeps its name
+BASE_COLLECTION = 'lost_found_items'
+LEGACY_MODEL = 'ViT-B/32'
+
+
+def collection_for_model(model_name):
+    """
+    Collection holding one model's embeddings
+
+    Args:
+        model_name (str): CLIP model name, e.g. 'ViT-L/14'
+
+    Returns:
+        str: lost_found_items for the original model, lost_found_items_<slug> otherwise
+    """
+    if model_name == LEGACY_MODEL:
+        return BASE_COLLECTION
+    return f"{BASE_COLLECTION}_{re.sub(r'[^a-z0-9]+', '_', model_name.lower()).strip('_')}"
+
+
+class EmbeddingVersions:
+    def __init__(self, db_path='embedding_versions.sqlite3', default_model=DEFAULT_MODEL):
+        """
+        Initialize the version registry
+
+        Args:
+            db_path (str): SQLite file holding the model roles
+            default_model (str): Read model until one has been recorded
+        """
+        self.db_path = db_path
+        self.default_model = default_model
+
+        self._create_table()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create_table(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # role: 'read' (searched and written), 'dual_write' (written only), 'retired'
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS embedding_models (
+                    model_name TEXT PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+
+    def read_model(self):
+        """Model whose collection serves searches"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT model_name FROM embedding_models WHERE role = 'read'").fetchone()
+        return row['model_name'] if row else self.default_model
+
+    def write_models(self):
+        """Models every new post has to be embedded with (read model first)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT model_name FROM embedding_models WHERE role = 'dual_write' ORDER BY updated_at"
+            ).fetchall()
+        return [self.read_model()] + [row['model_name'] for row in rows]
+
+    def start_dual_write(self, model_name):
+        """
+        Start writing new posts with an additional model
+
+        Args:
+            model_name (str): CLIP model to re-index to
+        """
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Record the current read model so the switch has something to replace
+            conn.execute(
+                "INSERT OR IGNORE INTO embedding_models (model_name, dim, role, updated_at) "
+                "SELECT ?, ?, 'read', ? WHERE NOT EXISTS (SELECT 1 FROM embedding_models WHERE role = 'read')",
+                (self.default_model, EMBEDDING_DIMS.get(self.default_model, 512), now)
+            )
+            conn.execute(
+                "INSERT INTO embedding_models (model_name, dim, role, updated_at) VALUES (?, ?, 'dual_write', ?) "
+                "ON CONFLICT(model_name) DO UPDATE SET role = 'dual_write', updated_at = excluded.updated_at "
+                "WHERE role != 'read'",
+                (model_name, EMBEDDING_DIMS.get(model_name, 512), now)
+            )
+            conn.execute('COMMIT')
+
+    def switch_reads(self, model_name):
+        """
+        Atomically make a dual-written model the read model
+
+        The previous read model is retired (its collection is kept for rollback).
+
+        Raises:
+            ValueError: If the model is not being dual-written
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT role FROM embedding_models WHERE model_name = ?', (model_name,)).fetchone()
+            if row is None or row['role'] != 'dual_write':
+                conn.execute('ROLLBACK')
+                raise ValueError(f"{model_name} is not being dual-written, re-index it first")
+
+            now = datetime.now().isoformat()
+            conn.execute("UPDATE embedding_models SET role = 'retired', updated_at = ? WHERE role = 'read'", (now,))
+            conn.execute("UPDATE embedding_models SET role = 'read', updated_at = ? WHERE model_name = ?", (now, model_name))
+            conn.execute('COMMIT')
+
+    def status(self):
+        """All recorded models and their roles"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM embedding_models ORDER BY updated_at').fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,68 @@
+"""
+Image Ingest - Produces one canonical downscaled master per upload
+
+Phone photos are often 12+ megapixels while CLIP looks at 224x224. Right
+after upload the image is decoded once, EXIF orientation is applied, and it
+is shrunk to a canonical size. That master replaces the upload, so
+embedding, variants and any later re-indexing decode a fraction of the
+pixels and never need to think about orientation again.
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+from services.upload_validation import UploadRejected
+
+CANONICAL_MAX_SIDE = 1024
+CANONICAL_QUALITY = 90
+
+
+def canonicalize_image(file_path, max_side=CANONICAL_MAX_SIDE, quality=CANONICAL_QUALITY):
+    """
+    Replace an uploaded image with its canonical JPEG master
+
+    Args:
+        file_path (str): Path to the uploaded image
+        max_side (int): Longest side of the master in pixels (never upscaled)
+        quality (int): JPEG quality of the master
+
+    Returns:
+        str: Path to the master (the original file is removed)
+
+    Raises:
+        UploadRejected: If the file cannot be decoded
+    """
+    master_path = f"{os.path.splitext(file_path)[0]}_master.jpg"
+
+    try:
+        with Image.open(file_path) as image:
+            original_size = image.size
+
+            # JPEG can decode straight to 1/2, 1/4 or 1/8 scale - far cheaper than a full decode
+            image.draft('RGB', (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+
+            if image.mode in ('RGBA', 'LA', 'P'):
+                # Flatten transparency onto white rather than black
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            else:
+                image = image.convert('RGB')
+
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            image.save(master_path, 'JPEG', quality=quality)
+    except (OSError, SyntaxError, ValueError, EOFError, Image.DecompressionBombError) as e:
+        # Truncated or malformed files often only fail once the pixels are decoded
+        # (UnidentifiedImageError is an OSError)
+        if os.path.exists(master_path):
+            os.remove(master_path)
+        raise UploadRejected(f"Could not decode image: {e}")
+
+    if master_path != file_path:
+        os.remove(file_path)
+
+    print(f"📐 Canonical master: {original_size[0]}x{original_size[1]} -> {image.size[0]}x{image.size[1]}")
+    return master_path
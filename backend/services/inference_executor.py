@@ -0,0 +1,87 @@
+"""
+Inference Executor - Bounded thread pool for CPU-bound embedding work
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    """Raised when every worker is busy and the pending queue is full"""
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=2, max_pending=8):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers (int): Number of threads running inference concurrently
+            max_pending (int): Number of extra jobs allowed to wait for a thread
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.capacity = max_workers + max_pending
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='inference'
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def is_saturated(self):
+        """Check whether a new job would be rejected right now"""
+        with self._lock:
+            return self._in_flight >= self.capacity
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Submit a job without blocking
+
+        Returns:
+            concurrent.futures.Future: Future for the job result
+
+        Raises:
+            ExecutorSaturated: If the executor has no free slot
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ExecutorSaturated(
+                    f"Inference executor saturated ({self._in_flight}/{self.capacity} jobs)"
+                )
+            self._in_flight += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a job on the executor and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self):
+        """Get current load information"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'in_flight': self._in_flight,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and release the worker threads"""
+        self._executor.shutdown(wait=wait)
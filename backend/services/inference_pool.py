@@ -0,0 +1,204 @@
+"""
+Inference Pool - Runs CLIP in dedicated worker processes
+
+The web process only reads the upload and copies its bytes into a shared
+memory block. A worker process decodes the image, runs the model and writes
+the embedding back into the same block, so no image data is pickled through
+the queue and the web process never holds the GIL for inference.
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+import multiprocessing as mp
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+from services import inference_worker
+from services.category_classifier import CATEGORY_PROMPTS, ZeroShotClassifier
+from services.embedding_versions import DEFAULT_MODEL
+from services.inference_worker import OUTPUT_BYTES
+
+# Workers are started one at a time - __main__ is swapped while they start
+_spawn_lock = threading.Lock()
+
+
+class InferenceTimeout(Exception):
+    """Raised when a worker does not return an embedding in time"""
+
+
+class InferencePool:
+    def __init__(self, num_workers=2, timeout=30, torch_threads=None, model_name=None):
+        """
+        Initialize the pool (worker processes start on first use)
+
+        Args:
+            num_workers (int): Number of inference worker processes
+            timeout (float): Seconds to wait for an embedding before giving up
+            torch_threads (int, optional): Torch intra-op threads per worker
+            model_name (str, optional): CLIP variant the workers load (default CLIP_MODEL)
+        """
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.torch_threads = torch_threads
+        self.model_name = model_name or DEFAULT_MODEL
+        self.device = f"pool ({num_workers} workers)"
+
+        self._ctx = mp.get_context('spawn')
+        self._lock = threading.Lock()
+        self._pid = None
+        self._workers = []
+        self._pending = {}  # job_id -> Future
+        self._running = {}  # job_id -> worker pid
+        self.category_classifier = None  # Set once the first worker is ready
+
+    def _ensure_started(self):
+        """Start workers in the current process (also after a fork)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._request_queue = self._ctx.Queue()
+            self._result_queue = self._ctx.Queue()
+            self._workers = [self._spawn_worker() for _ in range(self.num_workers)]
+            self._pending = {}
+            self._running = {}
+
+            threading.Thread(target=self._dispatch_results, daemon=True).start()
+            threading.Thread(target=self._supervise, daemon=True).start()
+            print(f"🏭 Inference pool started with {self.num_workers} worker processes")
+
+    def _spawn_worker(self):
+        process = self._ctx.Process(
+            target=inference_worker.worker_main,
+            args=(self._request_queue, self._result_queue, self.torch_threads, self.model_name),
+            daemon=True
+        )
+        # A spawned child re-imports the parent's __main__ first. For `python app.py`
+        # that would build the whole app again (and lock ./qdrant_data), so the
+        # child is pointed at the small worker module instead.
+        with _spawn_lock:
+            main_module = sys.modules['__main__']
+            sys.modules['__main__'] = inference_worker
+            try:
+                process.start()
+            finally:
+                sys.modules['__main__'] = main_module
+        return process
+
+    def _dispatch_results(self):
+        """Resolve futures as workers report back"""
+        while True:
+            kind, job_id, pid, value = self._result_queue.get()
+            if kind == 'ready':
+                device, text_embeddings = value
+                if self.category_classifier is None:
+                    self.category_classifier = ZeroShotClassifier(list(CATEGORY_PROMPTS), text_embeddings)
+                print(f"✅ Inference worker {pid} ready on {device}")
+                continue
+
+            with self._lock:
+                if kind == 'started':
+                    self._running[job_id] = pid
+                    continue
+                self._running.pop(job_id, None)
+                future = self._pending.pop(job_id, None)
+
+            if future is None:
+                continue  # Caller already timed out
+            if kind == 'done':
+                future.set_result(value)
+            else:
+                future.set_exception(Exception(f"Failed to generate embedding: {value}"))
+
+    def _supervise(self, interval=1.0):
+        """Replace workers that died or were killed"""
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                for i, process in enumerate(self._workers):
+                    if not process.is_alive():
+                        print(f"⚠️  Inference worker {process.pid} exited, restarting")
+                        self._workers[i] = self._spawn_worker()
+
+    def _kill_worker_running(self, job_id):
+        """Terminate the worker stuck on a job so the supervisor replaces it"""
+        with self._lock:
+            pid = self._running.pop(job_id, None)
+            self._pending.pop(job_id, None)
+            for process in self._workers:
+                if pid is not None and process.pid == pid:
+                    print(f"⏱️  Killing inference worker {pid} stuck on job {job_id}")
+                    process.terminate()
+
+    def generate_embedding(self, image_path):
+        """
+        Generate an embedding using a worker process
+
+        Args:
+            image_path (str): Path to image file
+
+        Returns:
+            np.ndarray: float32 embedding vector
+        """
+        import numpy as np
+
+        self._ensure_started()
+
+        with open(image_path, 'rb') as f:
+            image_bytes = f.read()
+
+        job_id = uuid.uuid4().hex
+        shm = shared_memory.SharedMemory(create=True, size=len(image_bytes) + OUTPUT_BYTES)
+        try:
+            shm.buf[:len(image_bytes)] = image_bytes
+
+            future = Future()
+            with self._lock:
+                self._pending[job_id] = future
+            self._request_queue.put((job_id, shm.name, len(image_bytes)))
+
+            try:
+                dim = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self._kill_worker_running(job_id)
+                raise InferenceTimeout(f"Embedding not ready after {self.timeout}s")
+
+            output = np.ndarray((dim,), dtype=np.float32, buffer=shm.buf, offset=len(image_bytes))
+            embedding = output.copy()  # The shared block is unlinked below
+            del output  # Release the buffer export before closing
+            return embedding
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def classify_category(self, embedding):
+        """
+        Predict the item category from an image embedding (zero-shot)
+
+        Returns:
+            tuple: (category, confidence), or None until a worker is ready
+        """
+        if self.category_classifier is None:
+            return None
+        return self.category_classifier.classify(embedding)
+
+    def stats(self):
+        """Get worker and queue information (never blocks on inference)"""
+        with self._lock:
+            return {
+                'workers': self.num_workers,
+                'alive': sum(1 for p in self._workers if p.is_alive()),
+                'pending': len(self._pending),
+                'running': len(self._running)
+            }
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        for _ in self._workers:
+            self._request_queue.put(None)
+        for process in self._workers:
+            process.join(timeout=5)
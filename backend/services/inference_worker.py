@@ -0,0 +1,53 @@
+"""
+Inference Worker - Entry point of the inference pool's worker processes
+
+Kept apart from the web app on purpose: spawned workers import only this
+module (and AIService), never app.py with its database and storage services.
+"""
+
+import io
+import os
+from multiprocessing import shared_memory, resource_tracker
+
+# Output area reserved after the image bytes (enough for 1024-d float32)
+MAX_EMBEDDING_DIM = 1024
+OUTPUT_BYTES = MAX_EMBEDDING_DIM * 4
+
+
+def worker_main(request_queue, result_queue, torch_threads, model_name):
+    """Entry point of an inference worker process"""
+    import numpy as np
+    from services.ai_service import AIService
+
+    ai_service = AIService(model_name)
+    if torch_threads:
+        ai_service.configure_threads(torch_threads)
+    # The pool classifies categories itself from these text embeddings
+    text_embeddings = ai_service.category_classifier.text_embeddings
+    result_queue.put(('ready', None, os.getpid(), (ai_service.device, text_embeddings)))
+
+    while True:
+        job = request_queue.get()
+        if job is None:
+            break
+
+        job_id, shm_name, image_size = job
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            continue  # Caller timed out and released the block already
+        # The web process owns the block - don't let this process unlink it
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        result_queue.put(('started', job_id, os.getpid(), None))
+
+        try:
+            image_bytes = io.BytesIO(bytes(shm.buf[:image_size]))
+            embedding = np.asarray(ai_service.generate_embedding(image_bytes), dtype=np.float32)
+            output = np.ndarray((embedding.size,), dtype=np.float32, buffer=shm.buf, offset=image_size)
+            output[:] = embedding
+            del output  # Release the buffer export before closing
+            result_queue.put(('done', job_id, os.getpid(), embedding.size))
+        except Exception as e:
+            result_queue.put(('error', job_id, os.getpid(), str(e)))
+        finally:
+            shm.close()
@@ -0,0 +1,144 @@
+"""
+Temp Janitor - Sweeps orphaned temp uploads and enforces a disk quota
+"""
+
+import os
+import threading
+import time
+
+# Files that belong to the directory itself
+KEEP_FILES = {'.gitkeep'}
+
+
+class TempJanitor:
+    def __init__(self, directory, max_age_seconds=3600, quota_bytes=1024 * 1024 * 1024, interval=300,
+                 partial_dirs=(), min_evict_age_seconds=300, protected_paths=None):
+        """
+        Initialize the janitor
+
+        Args:
+            directory (str): Temp upload directory (only top-level files are swept)
+            max_age_seconds (float): Files older than this are orphans
+            quota_bytes (int): Upper bound for the total size of temp files
+            interval (float): Seconds between sweeps
+            partial_dirs (tuple): Directories searched for stale partial writes (*.tmp)
+            min_evict_age_seconds (float): Files younger than this are never evicted for the quota
+                (they may belong to a request that is still running)
+            protected_paths (callable, optional): Returns paths that are still in use (e.g. by
+                queued jobs) - these are never removed, whatever their age
+        """
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.partial_dirs = partial_dirs
+        self.min_evict_age_seconds = min_evict_age_seconds
+        self.protected_paths = protected_paths
+
+        self._pid = None
+        self._lock = threading.Lock()
+        self.last_report = None
+
+    def start(self):
+        """Start sweeping in a background thread (once per process)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='temp-janitor', daemon=True).start()
+        print(f"🧹 Temp janitor watching {self.directory} (max age {self.max_age_seconds}s, quota {self.quota_bytes} bytes)")
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️  Temp janitor error: {e}")
+            time.sleep(self.interval)
+
+    def _temp_files(self):
+        """(mtime, size, path) for every temp file, oldest first"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name in KEEP_FILES or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()
+        return files
+
+    def _partial_files(self):
+        """(mtime, size, path) for leftover *.tmp files from interrupted writes"""
+        files = []
+        for partial_dir in self.partial_dirs:
+            for root, _, names in os.walk(partial_dir):
+                for name in names:
+                    if name.endswith('.tmp'):
+                        path = os.path.join(root, name)
+                        stat = os.stat(path)
+                        files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _protected(self):
+        """Absolute paths that must survive this sweep"""
+        if self.protected_paths is None:
+            return set()
+        return {os.path.abspath(path) for path in self.protected_paths()}
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False  # Already cleaned up by its request
+
+    def sweep(self):
+        """
+        Remove orphaned files, then evict oldest files until under quota
+
+        Returns:
+            dict: Files and bytes reclaimed by age and by quota
+        """
+        with self._lock:
+            now = time.time()
+            cutoff = now - self.max_age_seconds
+            evict_cutoff = now - self.min_evict_age_seconds
+            protected = self._protected()
+            report = {'expired_files': 0, 'evicted_files': 0, 'reclaimed_bytes': 0, 'remaining_bytes': 0}
+
+            # Partial writes only expire by age - a young one may still be in progress
+            for mtime, size, path in self._partial_files():
+                if mtime < cutoff and self._remove(path):
+                    report['expired_files'] += 1
+                    report['reclaimed_bytes'] += size
+
+            remaining = []
+            for mtime, size, path in self._temp_files():
+                if mtime < cutoff and os.path.abspath(path) not in protected:
+                    if self._remove(path):
+                        report['expired_files'] += 1
+                        report['reclaimed_bytes'] += size
+                else:
+                    remaining.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in remaining)
+            for mtime, size, path in remaining:
+                if total <= self.quota_bytes:
+                    break
+                if mtime >= evict_cutoff:
+                    break  # Oldest first - everything left is still in flight
+                if os.path.abspath(path) in protected:
+                    continue
+                if self._remove(path):
+                    report['evicted_files'] += 1
+                    report['reclaimed_bytes'] += size
+                total -= size
+
+            report['remaining_bytes'] = total
+            self.last_report = report
+
+            if report['expired_files'] or report['evicted_files']:
+                print(f"🧹 Reclaimed {report['reclaimed_bytes']} bytes "
+                      f"({report['expired_files']} expired, {report['evicted_files']} over quota)")
+            return report
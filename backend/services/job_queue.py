@@ -0,0 +1,223 @@
+"""
+Job Queue - SQLite-backed background jobs for slow requests
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class JobQueue:
+    def __init__(self, db_path='jobs.sqlite3', num_workers=1, poll_interval=2.0, stale_after=600,
+                 keep_finished=86400):
+        """
+        Initialize the job queue
+
+        Args:
+            db_path (str): SQLite file holding the jobs
+            num_workers (int): Number of background worker threads
+            poll_interval (float): Seconds between checks when no job was signalled
+            stale_after (float): Seconds after which a running job is considered abandoned
+            keep_finished (float): Seconds a done or failed job stays pollable before it is deleted
+        """
+        self.db_path = db_path
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.keep_finished = keep_finished
+        self.handler = None
+        self._last_pruned = 0.0
+
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._finished = threading.Condition()
+
+        self._create_table()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create_table(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)')
+
+    def start(self, handler):
+        """
+        Start the worker threads in the current process
+
+        Safe to call again after a fork - threads are only started once per process.
+
+        Args:
+            handler (callable): Called with the job payload dict, returns a JSON-serializable result
+        """
+        self.handler = handler
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+
+        # Jobs abandoned by a crashed process go back to the queue
+        cutoff = datetime.fromtimestamp(time.time() - self.stale_after).isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+                (datetime.now().isoformat(), cutoff)
+            )
+
+        for i in range(self.num_workers):
+            threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True).start()
+        print(f"📬 Job queue started with {self.num_workers} worker(s) ({self.db_path})")
+
+    def enqueue(self, payload):
+        """
+        Add a job to the queue
+
+        Args:
+            payload (dict): JSON-serializable job input
+
+        Returns:
+            str: Job ID
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now)
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Get job status and result (None if the job does not exist)"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        return {
+            'job_id': row['id'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def active_payloads(self):
+        """Payloads of jobs that are queued or running"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT payload FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return [json.loads(row['payload']) for row in rows]
+
+    def wait(self, job_id, timeout):
+        """
+        Long-poll a job until it finishes or the timeout expires
+
+        Returns:
+            dict: Job as returned by get()
+        """
+        deadline = time.monotonic() + timeout
+        job = self.get(job_id)
+        while job and job['status'] in ('queued', 'running'):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._finished:
+                self._finished.wait(min(remaining, self.poll_interval))
+            job = self.get(job_id)
+        return job
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                        (datetime.now().isoformat(), row['id'])
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            return row
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?',
+                (status, json.dumps(result) if result is not None else None, error,
+                 datetime.now().isoformat(), job_id)
+            )
+        with self._finished:
+            self._finished.notify_all()
+
+    def _prune(self):
+        """Delete done and failed jobs older than keep_finished (at most every few minutes)"""
+        now = time.monotonic()
+        if now - self._last_pruned < min(self.keep_finished, 300):
+            return
+        self._last_pruned = now
+
+        cutoff = datetime.fromtimestamp(time.time() - self.keep_finished).isoformat()
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (cutoff,)
+            ).rowcount
+        if deleted:
+            print(f"🧹 Pruned {deleted} finished job(s)")
+
+    def _work(self):
+        while True:
+            try:
+                row = self._claim()
+            except Exception as e:
+                print(f"⚠️  Job queue error: {e}")
+                row = None
+
+            if row is None:
+                try:
+                    self._prune()
+                except Exception as e:
+                    print(f"⚠️  Job queue error: {e}")
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id = row['id']
+            print(f"⚙️  Running job {job_id}")
+            try:
+                result = self.handler(json.loads(row['payload']))
+                self._finish(job_id, 'done', result=result)
+                print(f"✅ Job {job_id} done")
+            except Exception as e:
+                self._finish(job_id, 'failed', error=str(e))
+                print(f"❌ Job {job_id} failed: {e}")
@@ -0,0 +1,174 @@
+"""
+Model Artifacts - Loads CLIP weights from a local directory instead of the network
+
+With CLIP_MODEL_DIR set, weights are only ever read from that directory
+(filled by prepare_model_artifacts.py on a machine with network access).
+Every file is checked against its SHA-256 before it is loaded, and a missing
+or corrupt file stops startup with an explanation instead of a download.
+Hashing reads the whole file once per load - on every start and in every
+spawned inference pool worker (CLIP_VERIFY_CHECKSUM=false skips it).
+Without it, clip.load keeps downloading to the user cache as before.
+"""
+
+import hashlib
+import json
+import os
+
+import torch
+import clip
+from clip.clip import _MODELS, _download, _transform
+from clip.model import build_model
+
+CLIP_MODEL_DIR = os.getenv('CLIP_MODEL_DIR', '')
+CLIP_VERIFY_CHECKSUM = os.getenv('CLIP_VERIFY_CHECKSUM', 'true').lower() == 'true'
+CLIP_MODEL_MMAP = os.getenv('CLIP_MODEL_MMAP', 'false').lower() == 'true'  # Needs the exported state dict
+
+MANIFEST_NAME = 'manifest.json'  # file name -> SHA-256 of exported files
+
+
+class ModelArtifactError(Exception):
+    """Raised when the weights for a model are missing or fail verification"""
+
+
+def artifact_name(model_name):
+    """
+    File name of a model's original checkpoint, e.g. ViT-B-32.pt
+
+    Raises:
+        ModelArtifactError: If CLIP does not know the model
+    """
+    if model_name not in _MODELS:
+        raise ModelArtifactError(f"Unknown CLIP model '{model_name}'. Available: {', '.join(_MODELS)}")
+    return os.path.basename(_MODELS[model_name])
+
+
+def state_dict_name(model_name):
+    """File name of the exported (memory-mappable) state dict"""
+    return artifact_name(model_name).replace('.pt', '.state_dict.pt')
+
+
+def expected_sha256(model_name, file_name, artifact_dir):
+    """Checksum a file has to match: from CLIP's download URL or our manifest"""
+    if file_name == artifact_name(model_name):
+        # OpenAI publishes the checksum as part of the download URL
+        return _MODELS[model_name].split('/')[-2]
+    manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return json.load(f).get(file_name)
+    return None
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify(model_name, path, artifact_dir):
+    """
+    Check a weights file against its recorded checksum
+
+    Raises:
+        ModelArtifactError: If no checksum is recorded or it does not match
+    """
+    file_name = os.path.basename(path)
+    expected = expected_sha256(model_name, file_name, artifact_dir)
+    if expected is None:
+        raise ModelArtifactError(f"No checksum recorded for {path} - re-run prepare_model_artifacts.py")
+    actual = sha256_file(path)
+    if actual != expected:
+        raise ModelArtifactError(
+            f"Checksum mismatch for {path}: expected {expected}, got {actual}. "
+            f"The file is corrupt or incomplete - copy it again"
+        )
+
+
+def load_clip(model_name, device, artifact_dir=None, verify_checksum=None, mmap=None):
+    """
+    Load a CLIP model and its preprocessing
+
+    Args:
+        model_name (str): CLIP model name, e.g. 'ViT-B/32'
+        device (str): 'cpu' or 'cuda'
+        artifact_dir (str, optional): Local weights directory (default CLIP_MODEL_DIR, '' downloads)
+        verify_checksum (bool, optional): Hash the file before loading, a full extra read
+            (default CLIP_VERIFY_CHECKSUM)
+        mmap (bool, optional): Memory-map the exported state dict (default CLIP_MODEL_MMAP)
+
+    Returns:
+        tuple: (model, preprocess) as returned by clip.load
+
+    Raises:
+        ModelArtifactError: If the weights are missing or corrupt
+    """
+    artifact_dir = CLIP_MODEL_DIR if artifact_dir is None else artifact_dir
+    verify_checksum = CLIP_VERIFY_CHECKSUM if verify_checksum is None else verify_checksum
+    mmap = CLIP_MODEL_MMAP if mmap is None else mmap
+
+    if not artifact_dir:
+        return clip.load(model_name, device=device)
+
+    checkpoint_path = os.path.join(artifact_dir, artifact_name(model_name))
+    state_dict_path = os.path.join(artifact_dir, state_dict_name(model_name))
+    path = state_dict_path if mmap else checkpoint_path
+    if not os.path.isfile(path):
+        raise ModelArtifactError(
+            f"CLIP weights for {model_name} not found: {path} does not exist. "
+            f"Run 'python prepare_model_artifacts.py {model_name}' on a machine with network access "
+            f"and copy {os.path.abspath(artifact_dir)} to this node"
+        )
+
+    if verify_checksum:
+        verify(model_name, path, artifact_dir)
+
+    if not mmap:
+        # clip.load accepts a file path and never touches the network for it
+        return clip.load(path, device=device)
+
+    # build_model still copies every tensor into the model's own parameters. The mapped
+    # source is page cache the kernel can drop, so peak memory is one private copy
+    # instead of a loaded state dict plus the model.
+    state_dict = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    model = build_model(state_dict).to(device)
+    if device == 'cpu':
+        model.float()
+    return model, _transform(model.visual.input_resolution)
+
+
+def prepare(model_name, artifact_dir, export_state_dict=True):
+    """
+    Download a model's checkpoint into a directory (and export its state dict)
+
+    Args:
+        model_name (str): CLIP model name
+        artifact_dir (str): Directory to fill
+        export_state_dict (bool): Also write the memory-mappable state dict
+
+    Returns:
+        list: Paths of the files in the directory for this model
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    # CLIP's own downloader checks the SHA-256 in the URL
+    checkpoint_path = _download(_MODELS[model_name], artifact_dir)
+    paths = [checkpoint_path]
+
+    if export_state_dict:
+        with open(checkpoint_path, 'rb') as f:
+            state_dict = torch.jit.load(f, map_location='cpu').state_dict()
+        state_dict_path = os.path.join(artifact_dir, state_dict_name(model_name))
+        torch.save(state_dict, state_dict_path)
+
+        manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        manifest[os.path.basename(state_dict_path)] = sha256_file(state_dict_path)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        paths.append(state_dict_path)
+
+    return paths
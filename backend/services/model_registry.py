@@ -0,0 +1,212 @@
+"""
+Model Registry - Hosts several image encoders behind one interface
+
+Encoders are loaded on first use, so a large model only costs memory once
+something asks for it. Each model can have its own memory budget, and the
+registry as a whole has one too: when loading a model would exceed it, the
+least recently used idle models are unloaded first. Callers pick a model by
+name or by tier ('interactive' for the request path, 'offline' for
+background work).
+
+Encoders that live in other processes (inference pools) report no memory
+here. Their declared budget is counted instead, and it cannot be enforced.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+MB = 1024 * 1024
+
+
+class ModelBudgetExceeded(Exception):
+    """Raised when a model does not fit its own budget or the registry's"""
+
+
+def parse_model_spec(spec):
+    """
+    Parse a registry spec like 'interactive=ViT-B/32:600,offline=ViT-L/14:2000'
+
+    Args:
+        spec (str): Comma-separated tier=model[:budget_mb] entries
+
+    Returns:
+        tuple: ({tier: model_name}, {model_name: budget_mb})
+    """
+    tiers, budgets = {}, {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        tier, _, model = entry.partition('=')
+        model, _, budget = model.partition(':')
+        tiers[tier.strip()] = model.strip()
+        if budget:
+            budgets[model.strip()] = int(budget)
+    return tiers, budgets
+
+
+class ModelRegistry:
+    def __init__(self, loader, default_model, tiers=None, budgets_mb=None, total_budget_mb=0):
+        """
+        Initialize the registry (nothing is loaded yet)
+
+        Args:
+            loader (callable): Creates an encoder for a model name (e.g. AIService)
+            default_model (str or callable): Model used when none is requested
+                (a callable is asked on every request, e.g. the current read model)
+            tiers (dict, optional): Tier name -> model name
+            budgets_mb (dict, optional): Model name -> maximum memory in MB
+            total_budget_mb (int): Memory for all loaded models together (0 = unlimited)
+        """
+        self.loader = loader
+        self.default_model = default_model
+        self.tiers = tiers or {}
+        self.budgets_mb = budgets_mb or {}
+        self.total_budget_mb = total_budget_mb
+
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._encoders = {}  # model name -> encoder
+        self._memory = {}  # model name -> bytes
+        self._in_use = {}  # model name -> active callers
+        self._last_used = {}
+        self._threads = None
+
+    def resolve(self, model=None):
+        """Turn a tier name, model name or None into a model name"""
+        if model is None:
+            return self.default_model() if callable(self.default_model) else self.default_model
+        return self.tiers.get(model, model)
+
+    def _memory_bytes(self, encoder):
+        # Encoders in other processes (inference pools) don't count here
+        return encoder.memory_bytes() if hasattr(encoder, 'memory_bytes') else 0
+
+    def _release(self, encoder):
+        close = getattr(encoder, 'close', None) or getattr(encoder, 'shutdown', None)
+        if close:
+            close()
+
+    def _evict_for(self, needed_bytes):
+        """Unload idle models, least recently used first, until needed_bytes fit (lock held)"""
+        if not self.total_budget_mb:
+            return
+        budget = self.total_budget_mb * MB
+        idle = sorted(
+            (name for name in self._encoders if not self._in_use.get(name)),
+            key=lambda name: self._last_used.get(name, 0)
+        )
+        while sum(self._memory.values()) + needed_bytes > budget and idle:
+            name = idle.pop(0)
+            print(f"📤 Unloading {name} to stay within the model memory budget")
+            self._release(self._encoders.pop(name))
+            self._memory.pop(name, None)
+
+    def _load(self, model_name):
+        """Load a model once, even when several threads ask for it at the same time"""
+        with self._lock:
+            if model_name in self._encoders:
+                return self._encoders[model_name]
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            declared = self.budgets_mb.get(model_name, 0) * MB
+            with self._lock:
+                if model_name in self._encoders:
+                    return self._encoders[model_name]
+                # Make room for the model's declared budget - and refuse before paying for the load
+                self._evict_for(declared)
+                if self.total_budget_mb and sum(self._memory.values()) + declared > self.total_budget_mb * MB:
+                    raise ModelBudgetExceeded(
+                        f"No room for {model_name} ({declared // MB} MB declared) while other models are busy"
+                    )
+
+            encoder = self.loader(model_name)
+            if self._threads and hasattr(encoder, 'configure_threads'):
+                encoder.configure_threads(*self._threads)
+            memory = self._memory_bytes(encoder)
+
+            budget = self.budgets_mb.get(model_name)
+            if not memory:
+                if budget or self.total_budget_mb:
+                    print(f"⚠️  {model_name} runs in another process - counting its declared {budget or 0} MB, "
+                          f"the budget cannot be enforced")
+                memory = declared
+            elif budget and memory > budget * MB:
+                self._release(encoder)
+                raise ModelBudgetExceeded(f"{model_name} needs {memory // MB} MB, its budget is {budget} MB")
+
+            with self._lock:
+                self._evict_for(memory)
+                if self.total_budget_mb and sum(self._memory.values()) + memory > self.total_budget_mb * MB:
+                    self._release(encoder)
+                    raise ModelBudgetExceeded(f"No room for {model_name} ({memory // MB} MB) while other models are busy")
+                self._encoders[model_name] = encoder
+                self._memory[model_name] = memory
+            print(f"📦 Loaded {model_name} ({memory // MB} MB)")
+            return encoder
+
+    @contextmanager
+    def acquire(self, model=None):
+        """
+        Use an encoder, loading it if needed (it is not unloaded while in use)
+
+        Args:
+            model (str, optional): Model or tier name (default model if omitted)
+
+        Yields:
+            Encoder with generate_embedding/classify_category
+        """
+        model_name = self.resolve(model)
+        while True:
+            encoder = self._load(model_name)
+            with self._lock:
+                # It may have been evicted between loading and pinning it
+                if self._encoders.get(model_name) is encoder:
+                    self._in_use[model_name] = self._in_use.get(model_name, 0) + 1
+                    break
+        try:
+            yield encoder
+        finally:
+            with self._lock:
+                self._in_use[model_name] -= 1
+                self._last_used[model_name] = time.time()
+
+    def preload(self, model=None):
+        """Load a model now (e.g. before forking workers, so its memory is shared)"""
+        self._load(self.resolve(model))
+
+    def generate_embedding(self, image_path, model=None):
+        """Generate an embedding with the requested model"""
+        with self.acquire(model) as encoder:
+            return encoder.generate_embedding(image_path)
+
+    def classify_category(self, embedding, model=None):
+        """Zero-shot category from an embedding of the requested model"""
+        with self.acquire(model) as encoder:
+            return encoder.classify_category(embedding)
+
+    def configure_threads(self, intra_op_threads, inter_op_threads=None):
+        """Apply torch thread settings to loaded models and remember them for later loads"""
+        self._threads = (intra_op_threads, inter_op_threads)
+        with self._lock:
+            encoders = list(self._encoders.values())
+        for encoder in encoders:
+            if hasattr(encoder, 'configure_threads'):
+                encoder.configure_threads(intra_op_threads, inter_op_threads)
+
+    @property
+    def device(self):
+        with self._lock:
+            devices = {getattr(encoder, 'device', '?') for encoder in self._encoders.values()}
+        return ', '.join(sorted(devices)) or 'not loaded'
+
+    def stats(self):
+        """Loaded models, their memory and current callers"""
+        with self._lock:
+            return {
+                'tiers': dict(self.tiers),
+                'loaded': {
+                    name: {'memory_mb': self._memory.get(name, 0) // MB, 'in_use': self._in_use.get(name, 0)}
+                    for name in self._encoders
+                },
+                'total_budget_mb': self.total_budget_mb
+            }
@@ -0,0 +1,206 @@
+"""
+Perceptual Hash - Near-duplicate detection ahead of CLIP
+
+A 64-bit difference hash (dHash) is computed for every canonical master and
+stored in the point payload. Hashes are kept in a BK-tree, so a re-post of
+a known picture is found by Hamming distance in microseconds and can reuse
+the stored embedding instead of running CLIP again.
+"""
+
+import threading
+import time
+
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 gradient bits = 64-bit hash
+MAX_DISTANCE = 4  # Bits that may differ between near-duplicates (recompression, resizing)
+
+
+def dhash(image_path, hash_size=HASH_SIZE):
+    """
+    Compute the difference hash of an image
+
+    Args:
+        image_path (str): Path to the image (the canonical master)
+        hash_size (int): Hash side length, the hash has hash_size**2 bits
+
+    Returns:
+        str: Hash as a hex string (fits the payload without integer overflow)
+    """
+    with Image.open(image_path) as image:
+        image.draft('L', (hash_size * 4, hash_size * 4))
+        pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two integer hashes"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """Metric tree over Hamming distance for radius queries"""
+
+    def __init__(self):
+        self._root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, hash_value, item):
+        """Add an item under an integer hash"""
+        self.size += 1
+        if self._root is None:
+            self._root = [hash_value, [item], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [item], {}]
+                return
+            node = child
+
+    def search(self, hash_value, max_distance):
+        """
+        Find items within max_distance bits of a hash
+
+        Returns:
+            list: (distance, item) tuples, closest first
+        """
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, item) for item in node[1])
+
+            # Triangle inequality: only subtrees in this band can hold matches
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+
+        results.sort(key=lambda result: result[0])
+        return results
+
+
+class NearDuplicateIndex:
+    def __init__(self, vector_db_service, max_distance=MAX_DISTANCE, refresh_interval=300):
+        """
+        Initialize the index (built in the background from the collection payloads)
+
+        Args:
+            vector_db_service (VectorDBService or callable): Source of stored hashes, or a
+                function returning it (the tree then follows a switch of the read model)
+            max_distance (int): Hamming distance that still counts as a duplicate
+            refresh_interval (float): Seconds before the tree is rebuilt to pick up other writers
+        """
+        self._vector_db = vector_db_service
+        self.max_distance = max_distance
+        self.refresh_interval = refresh_interval
+
+        self._tree = None
+        self._built_at = 0
+        self._rebuilding = False
+        self._added_during_rebuild = []  # Points the rebuild's scroll may have missed
+        self._source = None  # Vector DB the tree follows
+        self._listening = []
+        self._lock = threading.Lock()
+
+    @property
+    def vector_db_service(self):
+        """Vector DB the tree should be built from right now"""
+        return self._vector_db() if callable(self._vector_db) else self._vector_db
+
+    def _refresh_if_stale(self, source):
+        """Start a background rebuild when the tree is missing, old or built from another model (lock held)"""
+        if source is not self._source:
+            # Old hashes stay valid meanwhile - point ids are the same in every model's collection
+            self._source = source
+            self._built_at = 0
+            if not any(watched is source for watched in self._listening):
+                # Points stored by this process are searchable right away
+                source.add_upsert_listener(
+                    lambda point_id, payload, source=source: self._on_upsert(source, point_id, payload)
+                )
+                self._listening.append(source)
+        if self._rebuilding:
+            return
+        if self._tree is not None and time.time() - self._built_at < self.refresh_interval:
+            return
+        self._rebuilding = True
+        self._added_during_rebuild = []
+        threading.Thread(target=self._rebuild, args=(source,), name='phash-rebuild', daemon=True).start()
+
+    def _rebuild(self, source):
+        try:
+            tree = BKTree()
+            for point_id, payload in source.iter_payloads(['phash']):
+                if payload.get('phash'):
+                    tree.add(int(payload['phash'], 16), point_id)
+
+            with self._lock:
+                for hash_value, point_id in self._added_during_rebuild:
+                    tree.add(hash_value, point_id)
+                # Searches keep using the old tree until this swap
+                self._tree = tree
+                # A tree of the model switched away from mid-build is rebuilt on the next search
+                self._built_at = time.time() if source is self._source else 0
+            print(f"🧬 Perceptual hash index built ({tree.size} images)")
+        except Exception as e:
+            print(f"⚠️  Perceptual hash index rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._added_during_rebuild = []
+
+    def _on_upsert(self, source, point_id, payload):
+        # Dual-written points arrive once per model - only the followed one counts
+        if source is self._source and payload.get('phash'):
+            self.add(payload['phash'], point_id)
+
+    def add(self, phash, point_id):
+        """Register a newly stored point"""
+        hash_value = int(phash, 16)
+        with self._lock:
+            if self._rebuilding:
+                self._added_during_rebuild.append((hash_value, point_id))
+            if self._tree is not None:
+                self._tree.add(hash_value, point_id)
+
+    def find(self, phash):
+        """
+        Find the closest stored near-duplicate of an image
+
+        Never waits for a rebuild - until the first one finishes nothing is
+        found and CLIP runs as usual.
+
+        Args:
+            phash (str): Hex hash from dhash()
+
+        Returns:
+            tuple: (point_id, distance), or None if nothing is close enough
+        """
+        source = self.vector_db_service
+        with self._lock:
+            self._refresh_if_stale(source)
+            if self._tree is None:
+                return None
+            results = self._tree.search(int(phash, 16), self.max_distance)
+
+        if not results:
+            return None
+        distance, point_id = results[0]
+        return point_id, distance
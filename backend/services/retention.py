@@ -0,0 +1,109 @@
+"""
+Retention Service - Moves stale and resolved posts out of the hot index
+
+Resolved/closed posts and posts older than the retention window no longer
+belong in everyday matching. A periodic compaction job moves them into a
+cold archive collection (vectors on disk), so the hot index only holds live
+posts while the archive stays searchable on demand.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.vector_db_service import CLOSED_STATUSES
+
+
+class RetentionService:
+    def __init__(self, vector_db_service, max_age_days=0, interval=3600, batch_size=256):
+        """
+        Initialize the service
+
+        Args:
+            vector_db_service (VectorDBService or callable): Vector DB to compact, or a function
+                returning it (each compaction then works on the current read model)
+            max_age_days (float): Posts created longer ago are archived (0 keeps them regardless of age)
+            interval (float): Seconds between compactions
+            batch_size (int): Points moved per request
+        """
+        self._vector_db = vector_db_service
+        self.max_age_days = max_age_days
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._pid = None
+        self._lock = threading.Lock()
+        self.last_report = None
+
+    @property
+    def vector_db_service(self):
+        """Vector DB to compact right now"""
+        return self._vector_db() if callable(self._vector_db) else self._vector_db
+
+    def start(self):
+        """Start compacting in a background thread (once per process)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='retention', daemon=True).start()
+        print(f"🗄️  Retention job running every {self.interval}s (max age {self.max_age_days or '∞'} days)")
+
+    def _run(self):
+        while True:
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️  Retention error: {e}")
+            time.sleep(self.interval)
+
+    def is_expired(self, payload, cutoff=None):
+        """
+        Check whether a post should leave the hot index
+
+        Args:
+            payload (dict): Point payload (status, created_at)
+            cutoff (datetime, optional): Posts created before this are stale
+
+        Returns:
+            str: 'resolved' or 'stale', or None if the post stays
+        """
+        if payload.get('status') in CLOSED_STATUSES:
+            return 'resolved'
+
+        if cutoff and payload.get('created_at'):
+            try:
+                if datetime.fromisoformat(payload['created_at']) < cutoff:
+                    return 'stale'
+            except (ValueError, TypeError):
+                pass  # Unparseable or timezone-aware dates never expire by age
+        return None
+
+    def compact(self):
+        """
+        Move every expired post into the archive
+
+        Returns:
+            dict: Counts of resolved and stale posts archived
+        """
+        with self._lock:
+            cutoff = datetime.now() - timedelta(days=self.max_age_days) if self.max_age_days else None
+            report = {'resolved': 0, 'stale': 0, 'archived': 0}
+
+            vector_db_service = self.vector_db_service
+            expired = []
+            for point_id, payload in vector_db_service.iter_payloads(['status', 'created_at']):
+                reason = self.is_expired(payload, cutoff)
+                if reason:
+                    report[reason] += 1
+                    expired.append(point_id)
+
+            # Collect first, move afterwards - scrolling while deleting can skip points
+            for start in range(0, len(expired), self.batch_size):
+                report['archived'] += vector_db_service.archive_points(expired[start:start + self.batch_size])
+
+            self.last_report = report
+            if report['archived']:
+                print(f"🗄️  Archived {report['archived']} posts "
+                      f"({report['resolved']} resolved, {report['stale']} stale)")
+            return report
@@ -0,0 +1,99 @@
+"""
+Single Flight - Coalesces identical concurrent computations
+
+When a client retries a slow matching request, the same image arrives again
+while the first computation is still running. Calls made with the same key
+while one is in flight wait for that call and share its result (or error),
+so the embedding and search run once.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-based coalescing for the Flask server and job workers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'executed': 0, 'shared': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless an identical call is already in flight
+
+        Args:
+            key: Hashable identity of the computation
+            fn (callable): Computation to run
+
+        Returns:
+            Result of fn, possibly computed by another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['executed'] += 1
+            else:
+                self._stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Get computations executed vs shared with a waiting caller"""
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """Coroutine-based coalescing for the ASGI server"""
+
+    def __init__(self):
+        self._tasks = {}
+        self._stats = {'executed': 0, 'shared': 0}
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """
+        Await coro_fn(*args, **kwargs) unless an identical call is already in flight
+
+        The computation runs as its own task, so a caller that disconnects
+        does not cancel it for the others.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self._stats['executed'] += 1
+        else:
+            self._stats['shared'] += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Get computations executed vs shared with a waiting caller"""
+        return {**self._stats, 'in_flight': len(self._tasks)}
@@ -0,0 +1,125 @@
+"""
+Standing Queries - Reverse matching of new posts against open posts
+
+Every open post stays in the vector DB with its embedding, which makes it a
+standing query: instead of re-running every old post's search when something
+new arrives, the new posts are searched once (in a single batch request)
+against open posts of the opposite type. Matches above the threshold are
+recorded as lost/found pairs in SQLite.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class StandingQueryService:
+    def __init__(self, vector_db_service, db_path='matches.sqlite3', min_similarity=0.80, top_k=20):
+        """
+        Initialize the service
+
+        Args:
+            vector_db_service (VectorDBService or callable): Vector DB holding the open posts,
+                or a function returning it (searches then follow the current read model)
+            db_path (str): SQLite file holding recorded match pairs
+            min_similarity (float): Minimum similarity for a pair to be recorded
+            top_k (int): Candidates fetched per new post
+        """
+        self._vector_db = vector_db_service
+        self.db_path = db_path
+        self.min_similarity = min_similarity
+        self.top_k = top_k
+
+        self._create_table()
+
+    @property
+    def vector_db_service(self):
+        """Vector DB to search right now"""
+        return self._vector_db() if callable(self._vector_db) else self._vector_db
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _create_table(self):
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS match_pairs (
+                    lost_post_id TEXT NOT NULL,
+                    found_post_id TEXT NOT NULL,
+                    similarity REAL NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (lost_post_id, found_post_id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_match_pairs_found ON match_pairs (found_post_id)')
+
+    def on_insert(self, posts):
+        """
+        Reverse-match newly inserted posts and record new pairs
+
+        Args:
+            posts (list): Dicts with 'post_id', 'embedding', 'post_type' and optional 'category'
+
+        Returns:
+            list: Newly recorded pairs as dicts (lost_post_id, found_post_id, similarity)
+        """
+        if not posts:
+            return []
+
+        results = self.vector_db_service.search_similar_batch(
+            posts,
+            top_k=self.top_k,
+            min_similarity=self.min_similarity,
+            open_only=True
+        )
+
+        now = datetime.now().isoformat()
+        new_pairs = []
+        with self._connect() as conn:
+            for post, matches in zip(posts, results):
+                for match in matches:
+                    if match['post_id'] == post['post_id']:
+                        continue
+
+                    if post['post_type'] == 'lost':
+                        lost_id, found_id = post['post_id'], match['post_id']
+                    else:
+                        lost_id, found_id = match['post_id'], post['post_id']
+
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO match_pairs (lost_post_id, found_post_id, similarity, created_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        (lost_id, found_id, match['similarity'], now)
+                    )
+                    if cursor.rowcount:
+                        new_pairs.append({
+                            'lost_post_id': lost_id,
+                            'found_post_id': found_id,
+                            'similarity': match['similarity']
+                        })
+
+        print(f"🔁 Reverse matching: {len(posts)} new post(s), {len(new_pairs)} new pair(s)")
+        return new_pairs
+
+    def get_matches(self, post_id):
+        """
+        Get recorded matches for a post, best first
+
+        Returns:
+            list: Dicts with 'post_id' (the other post), 'similarity' and 'created_at'
+        """
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT found_post_id AS post_id, similarity, created_at FROM match_pairs WHERE lost_post_id = ?
+                UNION ALL
+                SELECT lost_post_id AS post_id, similarity, created_at FROM match_pairs WHERE found_post_id = ?
+                ORDER BY similarity DESC
+            ''', (post_id, post_id)).fetchall()
+        return [dict(row) for row in rows]
@@ -1,19 +1,60 @@
 """
 Storage Service - Handles image upload to Firebase or local storage
+
+Images are content-addressed: each file is stored once under the SHA-256 of
+its bytes, sharded into nested directories (objects/ab/cd/<hash>.jpg), and
+a reference count tracks how many posts use it. Resized variants for the
+feed are generated in a background pool and stored next to the original
+(objects/ab/cd/<hash>_thumbnail.webp).
 """
 
+import hashlib
 import os
 import shutil
+import sqlite3
+import uuid
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from services.upload_queue import RemoteUploadQueue, LocalObjectStore, FirebaseObjectStore
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Variant name -> longest side in pixels
+VARIANT_SIZES = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1024  # Same as the canonical master from image_ingest
+}
+VARIANT_QUALITY = 80
+
+
+def hash_file(file_path):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 class StorageService:
     def __init__(self):
         """Initialize storage service"""
         self.use_firebase = False  # Set to True when Firebase is configured
+        self.remote_store = None
+        self.upload_queue = None
         self.local_storage_path = 'temp_uploads'
+        self.objects_dir = 'objects'
+        self.index_path = 'storage_index.sqlite3'  # Kept outside the served directory
+        self.base_url = 'http://localhost:5000/uploads'
+        self.variant_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='variants')
         
         # Create local storage directory if it doesn't exist
-        os.makedirs(self.local_storage_path, exist_ok=True)
+        os.makedirs(os.path.join(self.local_storage_path, self.objects_dir), exist_ok=True)
+        self._create_index()
         
         if self.use_firebase:
             try:
@@ -28,15 +69,93 @@ class StorageService:
                     })
                 
                 self.bucket = storage.bucket()
+                self.remote_store = FirebaseObjectStore(self.bucket)
                 print("✅ Firebase Storage initialized")
             except Exception as e:
                 print(f"⚠️  Firebase not configured, using local storage: {e}")
                 self.use_firebase = False
+        
+        # Local directory standing in for a bucket (exercises the remote path without Firebase)
+        object_store_dir = os.getenv('OBJECT_STORE_DIR')
+        if self.remote_store is None and object_store_dir:
+            self.remote_store = LocalObjectStore(object_store_dir, os.getenv('OBJECT_STORE_URL', 'http://localhost:9000'))
+            print(f"✅ Local stand-in object store: {object_store_dir}")
+        
+        if self.remote_store is not None:
+            self.upload_queue = RemoteUploadQueue(
+                self.remote_store,
+                spool_dir=os.getenv('UPLOAD_SPOOL_DIR', 'upload_spool'),
+                num_workers=int(os.getenv('UPLOAD_WORKERS', '4')),
+                on_uploaded=self._mark_stored
+            )
+    
+    def start(self):
+        """Start the background uploader (resumes uploads and deletes left by a previous run)"""
+        if self.upload_queue is not None:
+            self.upload_queue.start()
+            with self._connect() as conn:
+                leftover = [row['object_path'] for row in conn.execute('SELECT object_path FROM pending_deletes')]
+            for object_path in leftover:
+                self.variant_pool.submit(self._delete_remote, object_path)
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _create_index(self):
+        """Create the content hash -> object reference count table"""
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS objects (
+                    hash TEXT PRIMARY KEY,
+                    object_path TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_objects_url ON objects (url)')
+            # Variants that can be served (written locally, or uploaded to the remote store)
+            conn.execute('CREATE TABLE IF NOT EXISTS stored_variants (object_path TEXT PRIMARY KEY)')
+            # Remote objects whose row is gone but whose blobs are still being deleted
+            conn.execute('CREATE TABLE IF NOT EXISTS pending_deletes (object_path TEXT PRIMARY KEY)')
+    
+    def _object_path(self, content_hash, extension):
+        """Sharded relative path for a content hash, e.g. objects/ab/cd/abcd...jpg"""
+        return '/'.join([self.objects_dir, content_hash[:2], content_hash[2:4], f"{content_hash}{extension}"])
+    
+    def _variant_path(self, object_path, variant):
+        """Path of a resized variant stored next to the original"""
+        from PIL import features
+        
+        extension = '.webp' if features.check('webp') else '.jpg'
+        return f"{os.path.splitext(object_path)[0]}_{variant}{extension}"
+    
+    def _mark_stored(self, object_path):
+        """Record that a variant can be served"""
+        with self._connect() as conn:
+            conn.execute('INSERT OR IGNORE INTO stored_variants (object_path) VALUES (?)', (object_path,))
+    
+    def _url_for(self, object_path):
+        """Public URL of a stored object"""
+        if self.remote_store is not None:
+            return self.remote_store.public_url(object_path)
+        return f"{self.base_url}/{object_path}"
     
     def upload_image(self, file_path, post_id):
         """
         Upload image to Firebase Storage or local storage
         
+        Identical images are stored once; uploading a duplicate only adds a reference.
+        Remote uploads are queued, so the URL may serve a moment after this returns.
+        
         Args:
             file_path (str): Path to local file
             post_id (str): Unique post ID
@@ -44,53 +163,249 @@ class StorageService:
         Returns:
             str: URL of uploaded image
         """
-        if self.use_firebase:
-            return self._upload_to_firebase(file_path, post_id)
+        content_hash = hash_file(file_path)
+        extension = os.path.splitext(file_path)[1].lower()
+        object_path = self._object_path(content_hash, extension)
+        
+        url = self._add_reference(content_hash)
+        if url is not None:
+            print(f"♻️  Duplicate image {content_hash[:12]}... reused for post {post_id}")
+            return url
+        
+        # The copy happens outside the transaction, so uploads don't queue behind each other
+        staged_path = None
+        if self.remote_store is None:
+            staged_path = self._stage_local(file_path, object_path)
+        
+        try:
+            with self._connect() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute('SELECT url FROM objects WHERE hash = ?', (content_hash,)).fetchone()
+                    if row is not None:
+                        # The same image was stored while this one was being copied
+                        conn.execute('UPDATE objects SET refcount = refcount + 1 WHERE hash = ?', (content_hash,))
+                        conn.execute('COMMIT')
+                        return row['url']
+                    
+                    if staged_path is None and conn.execute(
+                        'SELECT 1 FROM pending_deletes WHERE object_path = ?', (object_path,)
+                    ).fetchone():
+                        # The previous copy is still being deleted remotely - don't land on its path
+                        object_path = self._object_path(f"{content_hash}-{uuid.uuid4().hex[:8]}", extension)
+                    if staged_path is not None:
+                        os.replace(staged_path, self._local_path(object_path))
+                    url = self._url_for(object_path)
+                    conn.execute(
+                        'INSERT INTO objects (hash, object_path, url, size, refcount, created_at) VALUES (?, ?, ?, ?, 1, ?)',
+                        (content_hash, object_path, url, os.path.getsize(file_path), datetime.now().isoformat())
+                    )
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+        finally:
+            if staged_path is not None and os.path.exists(staged_path):
+                os.remove(staged_path)
+        
+        if self.remote_store is not None:
+            try:
+                self._upload_to_remote(file_path, object_path)
+            except Exception:
+                self.delete_image(url)  # Don't leave a reference to an object that never uploads
+                raise
+        
+        # Resize for the feed off the request path. The caller may delete its
+        # file right away, so read from the stored copy or a private one.
+        if self.remote_store is not None:
+            fd, source_path = tempfile.mkstemp(suffix=extension)
+            os.close(fd)
+            shutil.copy2(file_path, source_path)
         else:
-            return self._upload_to_local(file_path, post_id)
+            source_path = self._local_path(object_path)
+        self.variant_pool.submit(self._generate_variants, source_path, object_path)
+        return url
     
-    def _upload_to_firebase(self, file_path, post_id):
-        """Upload to Firebase Storage"""
+    def _generate_variants(self, file_path, object_path):
+        """Create thumbnail/card/full variants of a stored image"""
+        from PIL import Image, ImageOps
+        
         try:
-            filename = os.path.basename(file_path)
-            blob_path = f"posts/{post_id}/{filename}"
+            for variant, size in VARIANT_SIZES.items():
+                with Image.open(file_path) as image:
+                    # Let JPEG decode at reduced scale when far larger than needed
+                    image.draft('RGB', (size, size))
+                    image = ImageOps.exif_transpose(image).convert('RGB')
+                    image.thumbnail((size, size), Image.LANCZOS)
+                    
+                    variant_path = self._variant_path(object_path, variant)
+                    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(variant_path)[1], delete=False) as tmp:
+                        temp_path = tmp.name
+                    try:
+                        image.save(temp_path, quality=VARIANT_QUALITY)
+                        if self.remote_store is not None:
+                            self._upload_to_remote(temp_path, variant_path)  # Marked stored once uploaded
+                        else:
+                            self._upload_to_local(temp_path, variant_path)
+                            self._mark_stored(variant_path)
+                    finally:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
             
-            blob = self.bucket.blob(blob_path)
-            blob.upload_from_filename(file_path)
-            blob.make_public()
+            print(f"🖼️  Generated variants for {os.path.basename(object_path)}")
+        except Exception as e:
+            print(f"⚠️  Variant generation failed for {object_path}: {e}")
+        finally:
+            if self.remote_store is not None and os.path.exists(file_path):
+                os.remove(file_path)
+    
+    def get_variant_urls(self, image_url):
+        """
+        Get URLs of the resized variants of a stored image
+        
+        Args:
+            image_url (str): URL returned by upload_image
+        
+        Returns:
+            dict: Variant name -> URL (empty for images not in this storage). Variants
+                that are not generated or uploaded yet point at the original.
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT object_path FROM objects WHERE url = ?', (image_url,)).fetchone()
+            if row is None:
+                return {}
             
-            return blob.public_url
+            paths = {variant: self._variant_path(row['object_path'], variant) for variant in VARIANT_SIZES}
+            placeholders = ', '.join('?' * len(paths))
+            stored = {
+                stored_row['object_path'] for stored_row in conn.execute(
+                    f'SELECT object_path FROM stored_variants WHERE object_path IN ({placeholders})',
+                    list(paths.values())
+                )
+            }
+        
+        variants = {
+            variant: self._url_for(path) if path in stored else image_url
+            for variant, path in paths.items()
+        }
+        variants['original'] = image_url
+        return variants
+    
+    def _add_reference(self, content_hash):
+        """Count one more use of an already stored image, returning its URL (None if not stored)"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT url FROM objects WHERE hash = ?', (content_hash,)).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE objects SET refcount = refcount + 1 WHERE hash = ?', (content_hash,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return row['url'] if row is not None else None
+    
+    def _local_path(self, object_path):
+        """File backing an object in local storage"""
+        return os.path.join(self.local_storage_path, *object_path.split('/'))
+    
+    def _stage_local(self, file_path, object_path):
+        """Copy a file next to its local destination, ready to be renamed into place"""
+        destination = self._local_path(object_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        shutil.copy2(file_path, temp_path)
+        return temp_path
+    
+    def _upload_to_remote(self, file_path, object_path):
+        """Queue an upload to the remote object store and return its URL right away"""
+        try:
+            self.upload_queue.enqueue(file_path, object_path)
+            return self.remote_store.public_url(object_path)
             
         except Exception as e:
-            raise Exception(f"Firebase upload failed: {str(e)}")
+            raise Exception(f"Remote upload failed: {str(e)}")
     
-    def _upload_to_local(self, file_path, post_id):
+    def _upload_to_local(self, file_path, object_path):
         """Save to local storage and return URL"""
         try:
-            filename = os.path.basename(file_path)
+            destination = self._local_path(object_path)
             
-            # Copy to permanent location
-            destination = os.path.join(self.local_storage_path, filename)
-            if file_path != destination:
-                shutil.copy2(file_path, destination)
+            # Copy next to the destination, then rename so readers never see a partial file
+            if not os.path.exists(destination):
+                os.replace(self._stage_local(file_path, object_path), destination)
             
             # Return local URL
-            return f"http://localhost:5000/uploads/{filename}"
+            return self._url_for(object_path)
             
         except Exception as e:
             raise Exception(f"Local storage failed: {str(e)}")
     
     def delete_image(self, image_url):
-        """Delete image from storage"""
-        if self.use_firebase:
-            # Extract blob path from URL and delete
-            pass
-        else:
-            # Delete from local storage
-            try:
-                filename = image_url.split('/')[-1]
-                file_path = os.path.join(self.local_storage_path, filename)
+        """
+        Release one reference to an image
+        
+        The stored object is only removed when its last reference goes away.
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    row = conn.execute('SELECT * FROM objects WHERE url = ?', (image_url,)).fetchone()
+                    if row is None:
+                        conn.execute('COMMIT')
+                        print(f"⚠️  Unknown image, nothing to delete: {image_url}")
+                        return
+                    
+                    if row['refcount'] > 1:
+                        conn.execute('UPDATE objects SET refcount = refcount - 1 WHERE hash = ?', (row['hash'],))
+                        conn.execute('COMMIT')
+                        return
+                    
+                    conn.execute('DELETE FROM objects WHERE hash = ?', (row['hash'],))
+                    conn.executemany(
+                        'DELETE FROM stored_variants WHERE object_path = ?',
+                        [(row['object_path'],)] + [
+                            (self._variant_path(row['object_path'], variant),) for variant in VARIANT_SIZES
+                        ]
+                    )
+                    if self.remote_store is None:
+                        # Local files go while the write lock is held - an upload of the
+                        # same image can't re-add the row in between and lose its blob
+                        self._delete_objects(row['object_path'])
+                    else:
+                        # Remote deletes are network calls - they run after the commit, and
+                        # uploads of the same image pick another path until they are done
+                        conn.execute('INSERT OR IGNORE INTO pending_deletes (object_path) VALUES (?)', (row['object_path'],))
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+            
+            if self.remote_store is not None:
+                self._delete_remote(row['object_path'])
+        except Exception as e:
+            print(f"Failed to delete image: {e}")
+    
+    def _delete_remote(self, object_path):
+        """Delete a remote object and its variants, then release its path"""
+        try:
+            self._delete_objects(object_path)
+            with self._connect() as conn:
+                conn.execute('DELETE FROM pending_deletes WHERE object_path = ?', (object_path,))
+        except Exception as e:
+            # Stays in pending_deletes and is retried on the next start
+            print(f"⚠️  Failed to delete {object_path} from remote storage: {e}")
+    
+    def _delete_objects(self, object_path):
+        """Remove an object and its variants from storage"""
+        object_paths = [object_path] + [self._variant_path(object_path, variant) for variant in VARIANT_SIZES]
+        for path in object_paths:
+            if self.remote_store is not None:
+                self.upload_queue.discard(path)
+                self.remote_store.delete(path)
+            else:
+                # Delete from local storage
+                file_path = self._local_path(path)
                 if os.path.exists(file_path):
                     os.remove(file_path)
-            except Exception as e:
-                print(f"Failed to delete image: {e}")
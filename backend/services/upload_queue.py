@@ -0,0 +1,300 @@
+"""
+Upload Queue - Background, retrying uploads to remote object storage
+
+Files are first copied into an on-disk spool, so a request can return right
+after the local write and pending uploads survive a restart. Worker threads
+drain a bounded in-memory queue, retrying failed uploads with exponential
+backoff. Jobs that run out of attempts stay parked in the spool and are
+retried on a slower timer, so an outage longer than the backoff window does
+not leave them stuck until the next restart.
+"""
+
+import json
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+import uuid
+
+
+class UploadQueueFull(Exception):
+    """Raised when the upload queue stays full for longer than the enqueue timeout"""
+
+
+class LocalObjectStore:
+    """Stand-in for a remote bucket that writes to a local directory (for testing)"""
+
+    def __init__(self, root, base_url):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, object_path):
+        return os.path.join(self.root, *object_path.split('/'))
+
+    def upload(self, file_path, object_path):
+        destination = self._path(object_path)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(file_path, destination)
+
+    def public_url(self, object_path):
+        return f"{self.base_url}/{object_path}"
+
+    def delete(self, object_path):
+        if os.path.exists(self._path(object_path)):
+            os.remove(self._path(object_path))
+
+
+class FirebaseObjectStore:
+    """Firebase Storage bucket"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def upload(self, file_path, object_path):
+        blob = self.bucket.blob(object_path)
+        blob.upload_from_filename(file_path)
+        blob.make_public()
+
+    def public_url(self, object_path):
+        # Computed locally, no request to the bucket
+        return self.bucket.blob(object_path).public_url
+
+    def delete(self, object_path):
+        blob = self.bucket.blob(object_path)
+        if blob.exists():
+            blob.delete()
+
+
+class RemoteUploadQueue:
+    def __init__(self, store, spool_dir='upload_spool', num_workers=4, max_queue=256,
+                 max_attempts=6, base_delay=1.0, max_delay=60.0, enqueue_timeout=5.0, on_uploaded=None,
+                 park_delay=300.0, max_park_delay=3600.0):
+        """
+        Initialize the upload queue
+
+        Args:
+            store: Object store with upload(file_path, object_path)
+            spool_dir (str): Directory holding files waiting to be uploaded
+            num_workers (int): Concurrent uploads
+            max_queue (int): Uploads waiting in memory before enqueue blocks
+            max_attempts (int): Attempts per upload before it is parked in the spool
+            base_delay (float): First retry delay in seconds (doubles every attempt)
+            max_delay (float): Upper bound for the retry delay
+            enqueue_timeout (float): Seconds enqueue waits for room in the queue
+            on_uploaded (callable, optional): Called with the object path once it is in the store
+            park_delay (float): Seconds before a job that ran out of attempts is tried again
+                (doubles every round)
+            max_park_delay (float): Upper bound for the parked retry delay
+        """
+        self.store = store
+        self.spool_dir = spool_dir
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.enqueue_timeout = enqueue_timeout
+        self.on_uploaded = on_uploaded
+        self.park_delay = park_delay
+        self.max_park_delay = max_park_delay
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pending = set()  # object paths spooled but not uploaded yet
+        self._discarded = set()
+        self._parked = {}  # job id -> (object path, monotonic time of the next round)
+        self._rounds = {}  # job id -> parked rounds so far
+        self._pid = None
+        self._stats = {'uploaded': 0, 'retried': 0, 'failed': 0}
+
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def start(self):
+        """Start upload workers and re-queue anything left in the spool"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+
+        # Snapshot the spool before any new job can be added to it
+        pending = sorted(name[:-len('.json')] for name in os.listdir(self.spool_dir) if name.endswith('.json'))
+        resumed = []
+        for job_id in pending:
+            try:
+                resumed.append(self._read_manifest(job_id)['object_path'])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️  Skipping unreadable spooled upload {job_id}: {e}")
+        with self._lock:
+            # Resumed uploads can be discarded like new ones
+            self._pending.update(resumed)
+
+        for i in range(self.num_workers):
+            threading.Thread(target=self._work, name=f'uploader-{i}', daemon=True).start()
+        threading.Thread(target=self._retry_parked, name='uploader-parked', daemon=True).start()
+        if pending:
+            print(f"📤 Resuming {len(pending)} spooled upload(s)")
+            threading.Thread(target=self._resume, args=(pending,), name='uploader-resume', daemon=True).start()
+
+    def _resume(self, job_ids):
+        """Queue uploads left in the spool by a previous run"""
+        for job_id in job_ids:
+            self._queue.put(job_id)
+
+    def enqueue(self, file_path, object_path):
+        """
+        Spool a file for upload and return immediately
+
+        Args:
+            file_path (str): Local file (copied, the caller may delete it)
+            object_path (str): Destination path in the object store
+
+        Raises:
+            UploadQueueFull: If the queue had no room within enqueue_timeout
+        """
+        self.start()
+
+        job_id = uuid.uuid4().hex
+        data_path = os.path.join(self.spool_dir, f"{job_id}.data")
+        manifest_path = os.path.join(self.spool_dir, f"{job_id}.json")
+
+        with self._lock:
+            self._pending.add(object_path)
+            self._discarded.discard(object_path)
+
+        shutil.copy2(file_path, data_path)
+        # Manifest is written last and atomically - it marks the job as durable
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump({'object_path': object_path}, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+        try:
+            self._queue.put(job_id, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._remove(job_id)
+            with self._lock:
+                self._pending.discard(object_path)
+            raise UploadQueueFull(f"Upload queue full, could not queue {object_path}")
+
+    def discard(self, object_path):
+        """Drop a pending upload (e.g. the image was deleted before it went out)"""
+        with self._lock:
+            if object_path not in self._pending:
+                return
+            parked = [job_id for job_id, (path, _) in self._parked.items() if path == object_path]
+            if not parked:
+                self._discarded.add(object_path)
+                return
+            # Nothing is working on a parked job - drop it right away
+            for job_id in parked:
+                del self._parked[job_id]
+                self._rounds.pop(job_id, None)
+                self._remove(job_id)
+            self._pending.discard(object_path)
+
+    def _read_manifest(self, job_id):
+        with open(os.path.join(self.spool_dir, f"{job_id}.json")) as f:
+            return json.load(f)
+
+    def _remove(self, job_id):
+        for suffix in ('.json', '.data'):
+            path = os.path.join(self.spool_dir, f"{job_id}{suffix}")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._upload_with_retries(job_id)
+            except Exception as e:
+                print(f"⚠️  Upload worker error for {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _upload_with_retries(self, job_id):
+        manifest = self._read_manifest(job_id)
+        object_path = manifest['object_path']
+        done = True
+        try:
+            done = self._upload_spooled(job_id, object_path)
+        finally:
+            with self._lock:
+                if done:
+                    self._pending.discard(object_path)
+                    self._rounds.pop(job_id, None)
+                else:
+                    self._park(job_id, object_path)
+
+    def _park(self, job_id, object_path):
+        """Schedule another round of attempts for a job that ran out of them (lock held)"""
+        rounds = self._rounds.get(job_id, 0) + 1
+        self._rounds[job_id] = rounds
+        delay = min(self.max_park_delay, self.park_delay * 2 ** (rounds - 1))
+        self._parked[job_id] = (object_path, time.monotonic() + delay)
+        print(f"🅿️  Upload of {object_path} parked, next round in {delay:.0f}s")
+
+    def _retry_parked(self):
+        """Re-queue parked jobs once their delay has passed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                due = [job_id for job_id, (_, retry_at) in self._parked.items() if retry_at <= now]
+                for job_id in due:
+                    del self._parked[job_id]
+                # New jobs are parked for at least park_delay
+                next_at = min([retry_at for _, retry_at in self._parked.values()] + [now + self.park_delay])
+
+            for job_id in due:
+                self._queue.put(job_id)
+            if not due:
+                time.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _upload_spooled(self, job_id, object_path):
+        """
+        Upload one spooled job, retrying with backoff
+
+        Returns:
+            bool: False if the job ran out of attempts and stays in the spool
+        """
+        data_path = os.path.join(self.spool_dir, f"{job_id}.data")
+
+        for attempt in range(1, self.max_attempts + 1):
+            with self._lock:
+                if object_path in self._discarded:
+                    self._discarded.discard(object_path)
+                    self._remove(job_id)
+                    return True
+
+            try:
+                self.store.upload(data_path, object_path)
+                self._remove(job_id)
+                with self._lock:
+                    self._stats['uploaded'] += 1
+                print(f"☁️  Uploaded {object_path}")
+                if self.on_uploaded:
+                    try:
+                        self.on_uploaded(object_path)
+                    except Exception as e:
+                        # The object is stored - don't upload it again for a bookkeeping error
+                        print(f"⚠️  Post-upload hook failed for {object_path}: {e}")
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    with self._lock:
+                        self._stats['failed'] += 1
+                    print(f"❌ Upload of {object_path} failed after {attempt} attempts, kept in spool: {e}")
+                    return False
+
+                # Exponential backoff with jitter so retries don't synchronize
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                with self._lock:
+                    self._stats['retried'] += 1
+                print(f"🔁 Upload of {object_path} failed ({e}), retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def stats(self):
+        """Get upload counters and queue depth"""
+        with self._lock:
+            return {**self._stats, 'queued': self._queue.qsize(), 'parked': len(self._parked)}
@@ -0,0 +1,190 @@
+"""
+Upload Validation - Rejects non-images and oversized images while streaming
+
+The image format and dimensions are read from the first bytes of the upload
+as they arrive, so garbage or decompression-bomb uploads are refused before
+the rest of the body is read and long before PIL or CLIP touch them.
+"""
+
+import os
+
+# Read here so the upload check and PIL's decompression-bomb limit (ai_service) agree
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', '50000000'))  # ~50 megapixels, above any phone camera
+MAX_IMAGE_SIDE = int(os.getenv('MAX_IMAGE_SIDE', '16384'))
+HEADER_LIMIT = 512 * 1024  # JPEG metadata (EXIF/XMP/ICC) can push the frame header this far
+
+# JPEG start-of-frame markers (carry the dimensions)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is not an acceptable image"""
+
+    def __init__(self, message, status_code=415):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _jpeg_size(data):
+    """Walk JPEG segments up to the frame header"""
+    i = 2
+    while True:
+        # Markers start with 0xFF, possibly padded with extra 0xFF fill bytes
+        while i < len(data) and data[i] == 0xFF:
+            i += 1
+        if i >= len(data):
+            return None
+        marker = data[i]
+        i += 1
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue  # Standalone markers have no length
+        if marker in (0xD9, 0xDA):
+            raise UploadRejected('Invalid JPEG: no frame header before image data')
+        if i + 2 > len(data):
+            return None
+
+        length = int.from_bytes(data[i:i + 2], 'big')
+        if marker in JPEG_SOF_MARKERS:
+            if i + 7 > len(data):
+                return None
+            height = int.from_bytes(data[i + 3:i + 5], 'big')
+            width = int.from_bytes(data[i + 5:i + 7], 'big')
+            return width, height
+        if length < 2:
+            raise UploadRejected('Invalid JPEG segment')
+        i += length
+
+
+def _png_size(data):
+    """Read the IHDR chunk, which must come first"""
+    if len(data) < 24:
+        return None
+    if data[12:16] != b'IHDR':
+        raise UploadRejected('Invalid PNG: missing IHDR')
+    return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+
+
+def _webp_size(data):
+    """Read the first chunk of a RIFF/WEBP container"""
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8X':
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    if chunk == b'VP8L':
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8 ':
+        width = int.from_bytes(data[26:28], 'little') & 0x3FFF
+        height = int.from_bytes(data[28:30], 'little') & 0x3FFF
+        return width, height
+    raise UploadRejected('Invalid WebP: unknown chunk')
+
+
+def inspect_image_header(data):
+    """
+    Identify an image from its first bytes
+
+    Args:
+        data (bytes): Beginning of the file
+
+    Returns:
+        tuple: (format, width, height), or None if more bytes are needed
+
+    Raises:
+        UploadRejected: If the bytes are not a supported image
+    """
+    if len(data) < 12:
+        return None
+
+    if data.startswith(b'\xff\xd8\xff'):
+        image_format, size = 'jpeg', _jpeg_size(data)
+    elif data.startswith(b'\x89PNG\r\n\x1a\n'):
+        image_format, size = 'png', _png_size(data)
+    elif data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        image_format, size = 'webp', _webp_size(data)
+    else:
+        raise UploadRejected('File is not a supported image (png, jpg, jpeg, webp)')
+
+    if size is None:
+        return None
+    return image_format, size[0], size[1]
+
+
+def check_dimensions(width, height, max_pixels=None, max_side=None):
+    """Reject empty or absurdly large images"""
+    max_pixels = max_pixels or MAX_IMAGE_PIXELS
+    max_side = max_side or MAX_IMAGE_SIDE
+
+    if width <= 0 or height <= 0:
+        raise UploadRejected('Image has no pixels')
+    if width > max_side or height > max_side or width * height > max_pixels:
+        raise UploadRejected(f"Image too large ({width}x{height})", status_code=413)
+
+
+def validate_image_file(fileobj, max_pixels=None, max_side=None, chunk_size=64 * 1024):
+    """
+    Validate an already received upload by reading only its header
+
+    Returns:
+        tuple: (format, width, height)
+    """
+    header = b''
+    info = None
+    while info is None and len(header) < HEADER_LIMIT:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        header += chunk
+        info = inspect_image_header(header)
+    fileobj.seek(0)
+
+    if info is None:
+        raise UploadRejected('Could not read image dimensions')
+    check_dimensions(info[1], info[2], max_pixels, max_side)
+    return info
+
+
+class ValidatingUploadStream:
+    """
+    File-like wrapper that validates an upload while it is being written
+
+    Wraps the stream werkzeug spools the upload into; every other attribute
+    is delegated, so it can be read back like a normal file.
+    """
+
+    def __init__(self, stream, max_pixels=None, max_side=None):
+        self._stream = stream
+        self._header = b''
+        self.max_pixels = max_pixels
+        self.max_side = max_side
+        self.validated = False
+        self.image_info = None
+
+    def write(self, data):
+        if not self.validated:
+            self._header += bytes(data[:HEADER_LIMIT - len(self._header)])
+            info = inspect_image_header(self._header)
+            if info is None:
+                if len(self._header) >= HEADER_LIMIT:
+                    raise UploadRejected('Could not read image dimensions')
+            else:
+                check_dimensions(info[1], info[2], self.max_pixels, self.max_side)
+                self.image_info = info
+                self.validated = True
+                self._header = b''
+        return self._stream.write(data)
+
+    def ensure_validated(self):
+        """Fail uploads that ended before the header could be read"""
+        if not self.validated:
+            raise UploadRejected('File is not a complete image')
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        return iter(self._stream)
@@ -2,22 +2,170 @@
 Vector Database Service - Handles embedding storage and similarity search using Qdrant
 """
 
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client.models import (
+    Datatype, Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, MatchAny,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    SearchParams, QuantizationSearchParams
+)
+
+from services.embedding_codec import PCACodec
+from services.embedding_versions import DEFAULT_MODEL, EMBEDDING_DIMS, collection_for_model
+from services.result_cache import LRUCache
+
+# Post statuses that no longer take part in matching
+CLOSED_STATUSES = ['resolved', 'closed']
+
+# Partition collections are named <collection>__<post_type>__<category slug>
+PARTITION_SEPARATOR = '__'
+PARTITION_LIST_TTL = 60  # Seconds before the partition list is re-read (other processes create them too)
+
+# Two-stage retrieval: coarse pass over quantized vectors, exact re-rank in float32
+RECENCY_HALF_LIFE_DAYS = 30
+
+
+def _quantization_config(kind):
+    """Qdrant quantization config for 'int8', 'binary' or 'none'"""
+    if kind == 'int8':
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True))
+    if kind == 'binary':
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
 
 
 class VectorDBService:
-    def __init__(self):
-        """Initialize Qdrant client (local mode)"""
-        self.collection_name = "lost_found_items"
+    def __init__(self, model_name=None, client=None, pca_path=None):
+        """
+        Initialize Qdrant client (server mode if QDRANT_URL is set, local mode otherwise)
         
-        # Initialize Qdrant in local mode (file-based storage)
-        self.client = QdrantClient(path="./qdrant_data")
+        Args:
+            model_name (str, optional): CLIP model whose embeddings this instance stores (default CLIP_MODEL)
+            client (QdrantClient, optional): Client shared with another instance (local mode allows only one)
+            pca_path (str, optional): PCA projection to apply (default EMBEDDING_PCA_PATH, '' for none)
+        """
+        self.model_name = model_name or DEFAULT_MODEL
+        self.embedding_dim = EMBEDDING_DIMS.get(self.model_name, 512)
+        self.collection_name = collection_for_model(self.model_name)
+        
+        # Reduced-precision storage: 'float16' halves vector memory (new collections only)
+        self.vector_datatype = os.getenv('VECTOR_DATATYPE', 'float32').lower()
+        if self.vector_datatype not in ('float32', 'float16'):
+            raise ValueError(f"VECTOR_DATATYPE must be 'float32' or 'float16', got '{self.vector_datatype}'")
+        
+        # Optional PCA projection fit offline for this model - reduced vectors
+        # live in their own collection, e.g. lost_found_items_pca128
+        self.codec = None
+        pca_path = os.getenv('EMBEDDING_PCA_PATH', '') if pca_path is None else pca_path
+        if pca_path:
+            codec = PCACodec.load(pca_path)
+            if codec.model_name in (None, self.model_name):
+                self.codec = codec
+                self.embedding_dim = codec.dim
+                self.collection_name = f"{self.collection_name}_pca{codec.dim}"
+            else:
+                # Expected for the other model during a dual-write upgrade, a typo otherwise
+                print(f"⚠️  {pca_path} was fit for {codec.model_name}, not {self.model_name} - "
+                      f"storing full {self.embedding_dim}-dim vectors for {self.model_name}")
+        self.archive_name = f"{self.collection_name}_archive"  # Expired/resolved posts, vectors on disk
+        
+        self.client = client or self._create_client()
         
-        # Create collection if it doesn't exist
-        self._create_collection_if_not_exists()
+        # 'single' uses Qdrant's scores as-is, 'two_stage' over-fetches from the
+        # quantized index and re-ranks the candidates exactly
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'single').lower()
+        self.quantization = os.getenv('VECTOR_QUANTIZATION', 'int8').lower()
+        # Existing collections keep their index unless the upgrade is asked for
+        # (Qdrant rebuilds the quantized copy of every vector in the background)
+        self.upgrade_quantization = os.getenv('VECTOR_QUANTIZATION_UPGRADE', 'false').lower() == 'true'
+        self.oversampling = int(os.getenv('RETRIEVAL_OVERSAMPLING', '4'))
+        self.recency_weight = float(os.getenv('RERANK_RECENCY_WEIGHT', '0'))
         
-        print(f"✅ Qdrant Vector DB initialized (collection: {self.collection_name})")
+        # 'none' keeps every post in one collection, 'collections' gives every
+        # (post_type, category) pair its own collection
+        self.partition_mode = os.getenv('PARTITION_MODE', 'none').lower()
+        self._partitions = None
+        self._partitions_at = 0
+        self._partitions_lock = threading.Lock()
+        # Partition each point was last written to, so a re-upsert that moves it
+        # deletes the old copy from that one partition only
+        self.routes_path = os.getenv('PARTITION_ROUTES_DB', 'partition_routes.sqlite3')
+        if self.partition_mode == 'collections':
+            self._create_routes_table()
+        
+        # Search results stay valid until this process writes to the collection.
+        # The TTL bounds staleness from writes made by other processes.
+        self._version = 0
+        self._version_lock = threading.Lock()
+        self._upsert_listeners = []  # e.g. the near-duplicate index
+        self._indexed = False
+        self._indexed_checked_at = 0
+        self.result_cache = LRUCache(
+            max_entries=int(os.getenv('MATCH_CACHE_SIZE', '1024')),
+            ttl=float(os.getenv('MATCH_CACHE_TTL', '60'))
+        )
+        
+        # Create collection if it doesn't exist (partitions are created on first write)
+        if self.partition_mode == 'collections':
+            print(f"✅ Qdrant Vector DB initialized (partitions: {self.collection_name}__<type>__<category>)")
+        else:
+            self._create_collection_if_not_exists()
+            print(f"✅ Qdrant Vector DB initialized (collection: {self.collection_name})")
+    
+    def _create_client(self):
+        """Create a Qdrant client for the configured deployment"""
+        qdrant_url = os.getenv('QDRANT_URL')
+        if qdrant_url:
+            # Server mode - required when several worker processes share the data
+            return QdrantClient(url=qdrant_url, api_key=os.getenv('QDRANT_API_KEY'))
+        
+        # Initialize Qdrant in local mode (file-based storage)
+        return QdrantClient(path="./qdrant_data")
+    
+    def reconnect(self):
+        """Open a fresh client (e.g. in a forked worker, so connections are not shared)"""
+        self.client = self._create_client()
+    
+    def _create_collection(self, collection_name, on_disk=False):
+        """
+        Create a collection with the standard vector configuration
+        
+        Args:
+            collection_name (str): Name of the collection
+            on_disk (bool): Keep vectors on disk and skip the in-RAM quantized copy (cold data)
+        """
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=self.embedding_dim,  # Output size of the CLIP model (or the PCA projection)
+                distance=Distance.COSINE,  # Cosine similarity
+                on_disk=on_disk,
+                datatype=Datatype.FLOAT16 if self.vector_datatype == 'float16' else Datatype.FLOAT32
+            ),
+            quantization_config=None if on_disk else _quantization_config(self.quantization)
+        )
+        print(f"✅ Created new collection: {collection_name}")
+    
+    def _ensure_archive(self):
+        """Create the cold archive collection on first use"""
+        collection_names = [col.name for col in self.client.get_collections().collections]
+        if self.archive_name not in collection_names:
+            try:
+                self._create_collection(self.archive_name, on_disk=True)
+            except Exception:
+                # Another process may have created it in the meantime
+                if self.archive_name not in [col.name for col in self.client.get_collections().collections]:
+                    raise
     
     def _create_collection_if_not_exists(self):
         """Create collection with proper configuration"""
@@ -26,137 +174,745 @@ class VectorDBService:
             collection_names = [col.name for col in collections]
             
             if self.collection_name not in collection_names:
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=512,  # CLIP ViT-B/32 embedding size
-                        distance=Distance.COSINE  # Cosine similarity
-                    )
-                )
-                print(f"✅ Created new collection: {self.collection_name}")
+                self._create_collection(self.collection_name)
             else:
                 print(f"✅ Collection already exists: {self.collection_name}")
+                self._ensure_quantization(self.collection_name)
+                self._check_datatype(self.collection_name)
                 
         except Exception as e:
             raise Exception(f"Failed to create collection: {str(e)}")
     
+    def _ensure_quantization(self, collection_name):
+        """Add the quantized index to an existing collection that was created without it (opt-in)"""
+        config = _quantization_config(self.quantization)
+        if config is None:
+            return
+        try:
+            info = self.client.get_collection(collection_name)
+            if info.config.quantization_config is None:
+                if not self.upgrade_quantization:
+                    print(f"ℹ️  {collection_name} has no quantized index - set VECTOR_QUANTIZATION_UPGRADE=true "
+                          f"to add {self.quantization} quantization")
+                    return
+                self.client.update_collection(
+                    collection_name=collection_name,
+                    quantization_config=config
+                )
+                print(f"✅ Enabled {self.quantization} quantization on {collection_name}")
+        except Exception as e:
+            print(f"⚠️  Could not enable quantization: {e}")
+    
+    def _check_datatype(self, collection_name):
+        """Warn when an existing collection stores another datatype than configured"""
+        try:
+            params = self.client.get_collection(collection_name).config.params.vectors
+            stored = getattr(params, 'datatype', None) or Datatype.FLOAT32
+            if stored.value != self.vector_datatype:
+                # Qdrant cannot convert vectors in place
+                print(f"⚠️  {collection_name} stores {stored.value} vectors, VECTOR_DATATYPE={self.vector_datatype} "
+                      f"only applies to new collections")
+        except Exception as e:
+            print(f"⚠️  Could not check vector datatype: {e}")
+    
+    def encode(self, embedding):
+        """
+        Bring a model embedding into the stored vector space
+        
+        Args:
+            embedding (np.ndarray): Embedding from the CLIP model
+        
+        Returns:
+            np.ndarray: The float32 embedding, or its PCA projection when a codec is configured
+        """
+        vector = np.asarray(embedding, dtype=np.float32)  # No copy for float32 arrays
+        if self.codec is None:
+            return vector
+        return self.codec.encode(vector)
+    
+    def partition_name(self, post_type, category):
+        """
+        Collection holding posts of one type and category
+        
+        Args:
+            post_type (str): 'lost' or 'found'
+            category (str, optional): Item category (None goes to 'uncategorized')
+        
+        Returns:
+            str: Collection name, e.g. lost_found_items__found__wallet
+        """
+        slug = re.sub(r'[^a-z0-9]+', '_', (category or 'uncategorized').lower()).strip('_')
+        return PARTITION_SEPARATOR.join([self.collection_name, post_type, slug])
+    
+    def _list_partitions(self, refresh=False):
+        """Names of existing partition collections (cached for PARTITION_LIST_TTL)"""
+        with self._partitions_lock:
+            if refresh or self._partitions is None or time.time() - self._partitions_at > PARTITION_LIST_TTL:
+                prefix = self.collection_name + PARTITION_SEPARATOR
+                self._partitions = sorted(
+                    col.name for col in self.client.get_collections().collections
+                    if col.name.startswith(prefix)
+                )
+                self._partitions_at = time.time()
+            return list(self._partitions)
+    
+    def _ensure_partition(self, collection_name):
+        """Create a partition collection on its first write"""
+        if collection_name in self._list_partitions() or collection_name in self._list_partitions(refresh=True):
+            return
+        try:
+            self._create_collection(collection_name)
+        except Exception:
+            # Another process may have created it in the meantime
+            if collection_name not in self._list_partitions(refresh=True):
+                raise
+        self._list_partitions(refresh=True)
+    
+    def _write_collection(self, payload):
+        """Collection a point with this payload is stored in"""
+        if self.partition_mode != 'collections':
+            return self.collection_name
+        
+        collection_name = self.partition_name(payload.get('post_type'), payload.get('category'))
+        self._ensure_partition(collection_name)
+        return collection_name
+    
+    def _search_collections(self, post_type, category=None):
+        """
+        Collections a search for the given query post has to touch
+        
+        Args:
+            post_type (str): Type of the query post (the opposite type is searched)
+            category (str, optional): Category filter
+        
+        Returns:
+            list: Collection names (a single partition when the category is known)
+        """
+        if self.partition_mode != 'collections':
+            return [self.collection_name]
+        
+        opposite_type = 'found' if post_type == 'lost' else 'lost'
+        partitions = self._list_partitions()
+        if category:
+            name = self.partition_name(opposite_type, category)
+            return [name] if name in partitions else []
+        
+        prefix = PARTITION_SEPARATOR.join([self.collection_name, opposite_type, ''])
+        return [name for name in partitions if name.startswith(prefix)]
+    
+    @contextmanager
+    def _routes_connect(self):
+        conn = sqlite3.connect(self.routes_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _create_routes_table(self):
+        with self._routes_connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS partition_routes (
+                    base TEXT NOT NULL,
+                    point_id TEXT NOT NULL,
+                    partition TEXT NOT NULL,
+                    PRIMARY KEY (base, point_id)
+                )
+            ''')
+    
+    def _drop_stale_copies(self, point_ids_by_collection):
+        """
+        Delete points from the partition they were in before this write
+        
+        A re-upsert whose post_type or category changed lands in another
+        partition - the copy in the old one would otherwise keep matching.
+        Only the recorded previous partition is touched, so points that did
+        not move cost no Qdrant request.
+        
+        Args:
+            point_ids_by_collection (dict): Partition just written -> point ids written to it
+        """
+        if self.partition_mode != 'collections':
+            return
+        
+        written = {
+            str(point_id): (point_id, collection_name)
+            for collection_name, point_ids in point_ids_by_collection.items()
+            for point_id in point_ids
+        }
+        keys = list(written)
+        stale = {}
+        with self._routes_connect() as conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT point_id, partition FROM partition_routes "
+                    f"WHERE base = ? AND point_id IN ({', '.join('?' * len(chunk))})",
+                    [self.collection_name] + chunk
+                )
+                for row in rows:
+                    point_id, collection_name = written[row['point_id']]
+                    if row['partition'] != collection_name:
+                        stale.setdefault(row['partition'], []).append(point_id)
+            
+            # Old copies go before the new route is recorded - a crash in between retries the delete
+            for collection_name, point_ids in stale.items():
+                if collection_name in self._list_partitions() or collection_name in self._list_partitions(refresh=True):
+                    self.client.delete(collection_name=collection_name, points_selector=point_ids)
+            
+            conn.executemany(
+                'INSERT OR REPLACE INTO partition_routes (base, point_id, partition) VALUES (?, ?, ?)',
+                [(self.collection_name, key, collection_name) for key, (_, collection_name) in written.items()]
+            )
+    
+    def _forget_routes(self, point_ids):
+        """Drop recorded partitions of points that left the hot collections"""
+        if self.partition_mode != 'collections' or not point_ids:
+            return
+        with self._routes_connect() as conn:
+            conn.executemany(
+                'DELETE FROM partition_routes WHERE base = ? AND point_id = ?',
+                [(self.collection_name, str(point_id)) for point_id in point_ids]
+            )
+    
+    def _all_collections(self):
+        """Every collection holding posts"""
+        if self.partition_mode != 'collections':
+            return [self.collection_name]
+        return self._list_partitions()
+    
+    def _bump_version(self):
+        """Invalidate cached search results after a write"""
+        with self._version_lock:
+            self._version += 1
+    
+    def _cache_key(self, embedding, post_type, category, top_k, min_similarity):
+        """Cache key for a search (includes the collection version)"""
+        digest = hashlib.sha1(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+        return (self._version, digest, post_type, category, top_k, min_similarity)
+    
+    def add_upsert_listener(self, callback):
+        """
+        Get told about points written to the hot collection(s)
+        
+        Args:
+            callback (callable): Called with (point_id, payload) after each successful upsert
+        """
+        self._upsert_listeners.append(callback)
+    
+    def _notify_upserted(self, points):
+        for callback in self._upsert_listeners:
+            for point_id, payload in points:
+                try:
+                    callback(point_id, payload)
+                except Exception as e:
+                    # Listeners keep derived indexes - the point itself is stored
+                    print(f"⚠️  Upsert listener failed for {point_id}: {e}")
+    
     def upsert_embedding(self, point_id, embedding, payload):
         """
         Store or update an embedding in the vector database
         
         Args:
             point_id (str): Unique identifier for the point
-            embedding (list): 512-dimensional embedding vector
-            payload (dict): Metadata to store with the embedding
+            embedding (np.ndarray): 512-dimensional embedding vector
+            payload (dict): Metadata to store with the embedding (post_type/category pick the partition)
         """
         try:
+            # Tag the point with the model that produced it
+            payload = {**payload, 'embedding_model': self.model_name}
+            collection_name = self._write_collection(payload)
             self.client.upsert(
-                collection_name=self.collection_name,
+                collection_name=collection_name,
                 points=[
                     PointStruct(
                         id=point_id,
-                        vector=embedding,
+                        vector=self.encode(embedding).tolist(),  # Lists only on the wire
                         payload=payload
                     )
                 ]
             )
+            # Written first, then removed elsewhere - a crash in between leaves a duplicate, never a loss
+            self._drop_stale_copies({collection_name: [point_id]})
+            self._bump_version()
         except Exception as e:
             raise Exception(f"Failed to upsert embedding: {str(e)}")
+        self._notify_upserted([(point_id, payload)])
+    
+    def upsert_embeddings(self, points, archived=False, encoded=False):
+        """
+        Store several embeddings, one request per target collection
+        
+        Args:
+            points (list): (point_id, embedding, payload) tuples
+            archived (bool): Write into the cold archive instead of the hot collection(s)
+            encoded (bool): Vectors are already in the stored space (copied from a collection)
+        """
+        try:
+            if archived:
+                self._ensure_archive()
+            
+            by_collection = {}
+            for point_id, embedding, payload in points:
+                collection_name = self.archive_name if archived else self._write_collection(payload)
+                by_collection.setdefault(collection_name, []).append(
+                    PointStruct(id=point_id, vector=list(embedding) if encoded else self.encode(embedding).tolist(), payload={**payload, 'embedding_model': self.model_name})
+                )
+            
+            for collection_name, structs in by_collection.items():
+                self.client.upsert(collection_name=collection_name, points=structs)
+            if not archived:
+                self._drop_stale_copies({
+                    collection_name: [struct.id for struct in structs]
+                    for collection_name, structs in by_collection.items()
+                })
+            self._bump_version()
+        except Exception as e:
+            raise Exception(f"Failed to upsert embeddings: {str(e)}")
+        if not archived:
+            self._notify_upserted([(point_id, payload) for point_id, _, payload in points])
+    
+    def _build_filter(self, post_type, category=None, open_only=False):
+        """
+        Build the search filter for a query post
+        
+        Args:
+            post_type (str): Type of the query post ('lost' or 'found')
+            category (str, optional): Restrict to this category
+            open_only (bool): Exclude resolved/closed posts
+        
+        Returns:
+            Filter: Qdrant filter matching posts of the opposite type
+        """
+        # Search for opposite type (lost searches found, found searches lost)
+        opposite_type = 'found' if post_type == 'lost' else 'lost'
+        
+        # Build filter conditions - CATEGORY FIRST for efficiency
+        filter_conditions = [
+            FieldCondition(
+                key="post_type",
+                match=MatchValue(value=opposite_type)
+            )
+        ]
+        
+        # Add category filter if provided (reduces search space)
+        if category:
+            filter_conditions.append(
+                FieldCondition(
+                    key="category",
+                    match=MatchValue(value=category)
+                )
+            )
+            print(f"🔍 Filtering by category: {category}")
+        
+        must_not = []
+        if open_only:
+            must_not.append(
+                FieldCondition(
+                    key="status",
+                    match=MatchAny(any=CLOSED_STATUSES)
+                )
+            )
+        
+        # Create combined filter
+        return Filter(must=filter_conditions, must_not=must_not or None)
+    
+    def _format_matches(self, search_results, min_similarity):
+        """Convert scored points to match dictionaries above the threshold"""
+        matches = []
+        for result in search_results:
+            similarity = result.score
+            
+            # Apply minimum similarity filter
+            if similarity >= min_similarity:
+                matches.append({
+                    'post_id': result.payload.get('post_id', result.id),
+                    'similarity': similarity,
+                    'payload': result.payload
+                })
+            else:
+                print(f"⚠️  Filtered out: {result.payload.get('title')} - {similarity*100:.1f}% (below {min_similarity*100}%)")
+        
+        return matches
+    
+    def _query_collection(self, collection_name, embedding, search_filter, limit, with_vectors=False, search_params=None):
+        """Run one vector query, with a fallback for older Qdrant clients"""
+        try:
+            # Use the correct method based on Qdrant version
+            return self.client.query_points(
+                collection_name=collection_name,
+                query=embedding,
+                limit=limit,
+                query_filter=search_filter,
+                search_params=search_params,
+                with_payload=True,
+                with_vectors=with_vectors
+            ).points
+        except AttributeError:
+            # Fallback for older versions - use search method
+            return self.client.search(
+                collection_name=collection_name,
+                query_vector=embedding,
+                limit=limit,
+                query_filter=search_filter,
+                search_params=search_params,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+    
+    def _query(self, collections, embedding, search_filter, limit, with_vectors=False, search_params=None):
+        """Query one or more collections and merge the best results"""
+        if len(collections) == 1:
+            return self._query_collection(collections[0], embedding, search_filter, limit, with_vectors, search_params)
+        
+        results = []
+        for collection_name in collections:
+            results.extend(self._query_collection(collection_name, embedding, search_filter, limit, with_vectors, search_params))
+        results.sort(key=lambda result: result.score, reverse=True)
+        return results[:limit]
     
-    def search_similar(self, embedding, post_type, category=None, top_k=10, min_similarity=0.60):
+    def _feature_bonus(self, payload):
+        """Business re-rank feature: newer posts rank higher"""
+        if self.recency_weight and payload.get('created_at'):
+            try:
+                age_days = (datetime.now() - datetime.fromisoformat(payload['created_at'])).total_seconds() / 86400
+                return self.recency_weight * 0.5 ** (max(age_days, 0) / RECENCY_HALF_LIFE_DAYS)
+            except ValueError:
+                pass
+        return 0.0
+    
+    def _search_two_stage(self, collections, embedding, search_filter, top_k):
+        """
+        Over-fetch candidates from the quantized index, then re-rank them exactly
+        
+        Args:
+            collections (list): Collections to search
+            embedding (np.ndarray): Query embedding vector
+            search_filter (Filter): Qdrant filter
+            top_k (int): Number of results to return
+        
+        Returns:
+            list: Candidates with exact cosine scores, best first
+        """
+        candidates = self._query(
+            collections,
+            embedding,
+            search_filter,
+            limit=top_k * self.oversampling,
+            with_vectors=True,
+            # Stage one stays entirely on the compressed vectors
+            search_params=SearchParams(quantization=QuantizationSearchParams(ignore=False, rescore=False))
+        )
+        if not candidates:
+            return []
+        
+        # Stage two: one matrix-vector product over the original float32 vectors
+        query = embedding / np.linalg.norm(embedding)  # Not in place - the caller's array stays intact
+        vectors = np.asarray([candidate.vector for candidate in candidates], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = vectors @ query
+        
+        # Similarity stays the exact cosine; features only change the order
+        reranked = sorted(
+            (
+                (float(score) + self._feature_bonus(candidate.payload or {}),
+                 SimpleNamespace(id=candidate.id, payload=candidate.payload, score=float(score)))
+                for candidate, score in zip(candidates, scores)
+            ),
+            key=lambda item: item[0],
+            reverse=True
+        )
+        return [point for _, point in reranked[:top_k]]
+    
+    def search_similar(self, embedding, post_type, category=None, top_k=10, min_similarity=0.60, include_archive=False):
         """
         Search for similar items in the vector database
         
         Args:
-            embedding (list): Query embedding vector
+            embedding (np.ndarray): Query embedding vector
             post_type (str): Type of the query post ('lost' or 'found')
             category (str, optional): Filter by category (e.g., 'Wallet', 'Phone', 'Bag')
             top_k (int): Number of results to return
             min_similarity (float): Minimum similarity threshold (0-1)
+            include_archive (bool): Also search archived (expired/resolved) posts
         
         Returns:
             list: List of matching posts with similarity scores
         """
         try:
-            # Search for opposite type (lost searches found, found searches lost)
-            opposite_type = 'found' if post_type == 'lost' else 'lost'
+            cache_key = self._cache_key(embedding, post_type, category, top_k, min_similarity) + (include_archive,)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ Match cache hit ({len(cached)} matches)")
+                return list(cached)
             
-            # Build filter conditions - CATEGORY FIRST for efficiency
-            filter_conditions = [
-                FieldCondition(
-                    key="post_type",
-                    match=MatchValue(value=opposite_type)
-                )
-            ]
-            
-            # Add category filter if provided (reduces search space)
-            if category:
-                filter_conditions.append(
-                    FieldCondition(
-                        key="category",
-                        match=MatchValue(value=category)
-                    )
-                )
-                print(f"🔍 Filtering by category: {category}")
+            search_filter = self._build_filter(post_type, category)
+            collections = self._search_collections(post_type, category)
+            if include_archive and self.archive_name in [col.name for col in self.client.get_collections().collections]:
+                collections.append(self.archive_name)
+            
+            embedding = self.encode(embedding)
+            if not collections:
+                search_results = []  # Nothing of this type/category has been stored yet
+            elif self.retrieval_mode == 'two_stage':
+                search_results = self._search_two_stage(collections, embedding, search_filter, top_k)
+            else:
+                search_results = self._query(collections, embedding, search_filter, top_k)
+            
+            # Format results and apply similarity threshold
+            matches = self._format_matches(search_results, min_similarity)
+            self.result_cache.put(cache_key, matches)
             
-            # Create combined filter
-            search_filter = Filter(must=filter_conditions)
+            print(f"✨ Found {len(matches)} matches above {min_similarity*100}% similarity")
+            return list(matches)
+            
+        except Exception as e:
+            print(f"Search error: {str(e)}")
+            return []
+    
+    def search_similar_batch(self, queries, top_k=10, min_similarity=0.60, open_only=False):
+        """
+        Run several searches in a single request to Qdrant
+        
+        Args:
+            queries (list): Dicts with 'embedding', 'post_type' and optional 'category'
+            top_k (int): Number of results per query
+            min_similarity (float): Minimum similarity threshold (0-1)
+            open_only (bool): Exclude resolved/closed posts
+        
+        Returns:
+            list: One list of matches per query, in the same order
+        """
+        if not queries:
+            return []
+        
+        filters = [
+            self._build_filter(q['post_type'], q.get('category'), open_only=open_only)
+            for q in queries
+        ]
+        queries = [{**q, 'embedding': self.encode(q['embedding'])} for q in queries]
+        
+        try:
+            if self.partition_mode == 'collections':
+                # Queries go to different partitions - route each one separately
+                batch_results = []
+                for q, f in zip(queries, filters):
+                    collections = self._search_collections(q['post_type'], q.get('category'))
+                    batch_results.append(self._query(collections, q['embedding'], f, top_k) if collections else [])
+                return [self._format_matches(results, min_similarity) for results in batch_results]
             
-            # Perform search using query_points (newer Qdrant API)
             try:
-                # Use the correct method based on Qdrant version
-                search_results = self.client.query_points(
+                from qdrant_client.models import QueryRequest
+                responses = self.client.query_batch_points(
                     collection_name=self.collection_name,
-                    query=embedding,
-                    limit=top_k,
-                    query_filter=search_filter,
-                    with_payload=True
-                ).points
-            except AttributeError:
-                # Fallback for older versions - use search method
-                search_results = self.client.search(
+                    requests=[
+                        QueryRequest(query=q['embedding'].tolist(), filter=f, limit=top_k, with_payload=True)
+                        for q, f in zip(queries, filters)
+                    ]
+                )
+                batch_results = [response.points for response in responses]
+            except (AttributeError, ImportError):
+                # Fallback for older versions - use search_batch method
+                from qdrant_client.models import SearchRequest
+                batch_results = self.client.search_batch(
                     collection_name=self.collection_name,
-                    query_vector=embedding,
-                    limit=top_k,
-                    query_filter=search_filter,
-                    with_payload=True
+                    requests=[
+                        SearchRequest(vector=q['embedding'].tolist(), filter=f, limit=top_k, with_payload=True)
+                        for q, f in zip(queries, filters)
+                    ]
                 )
             
-            # Format results and apply similarity threshold
-            matches = []
-            for result in search_results:
-                similarity = result.score
+            return [self._format_matches(results, min_similarity) for results in batch_results]
+            
+        except Exception as e:
+            print(f"Batch search error: {str(e)}")
+            return [[] for _ in queries]
+    
+    def get_embedding(self, point_id):
+        """
+        Fetch the stored embedding of a point
+        
+        Args:
+            point_id (str): Point identifier
+        
+        Returns:
+            np.ndarray: float32 embedding in the model's space, or None if the point does not exist
+        """
+        try:
+            for collection_name in self._all_collections():
+                points = self.client.retrieve(
+                    collection_name=collection_name,
+                    ids=[point_id],
+                    with_vectors=True,
+                    with_payload=False
+                )
+                if points:
+                    if self.codec is not None:
+                        # Approximate model embedding - it projects back onto the stored vector
+                        return self.codec.decode(points[0].vector)
+                    return np.asarray(points[0].vector, dtype=np.float32)
+            return None
+        except Exception as e:
+            raise Exception(f"Failed to retrieve embedding: {str(e)}")
+    
+    def _scroll(self, archived, batch_size, with_payload, with_vectors):
+        """Scroll through every point of the hot collection(s) or the archive"""
+        if archived:
+            existing = [col.name for col in self.client.get_collections().collections]
+            collections = [self.archive_name] if self.archive_name in existing else []
+        else:
+            collections = self._all_collections()
+        
+        for collection_name in collections:
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=with_payload,
+                    with_vectors=with_vectors
+                )
+                yield from points
+                if offset is None:
+                    break
+    
+    def iter_payloads(self, fields, batch_size=256, archived=False):
+        """
+        Iterate over all points, yielding selected payload fields
+        
+        Args:
+            fields (list): Payload keys to fetch (None for the whole payload)
+            batch_size (int): Points per scroll request
+            archived (bool): Iterate the cold archive instead of the hot collection(s)
+        
+        Yields:
+            tuple: (point_id, payload)
+        """
+        for point in self._scroll(archived, batch_size, fields if fields is not None else True, False):
+            yield point.id, point.payload or {}
+    
+    def iter_points(self, batch_size=256, archived=False):
+        """
+        Iterate over all points with their stored vectors
+        
+        Args:
+            batch_size (int): Points per scroll request
+            archived (bool): Iterate the cold archive instead of the hot collection(s)
+        
+        Yields:
+            tuple: (point_id, vector as stored, payload)
+        """
+        for point in self._scroll(archived, batch_size, True, True):
+            yield point.id, point.vector, point.payload or {}
+    
+    def archive_points(self, point_ids):
+        """
+        Move points from the hot collection(s) into the cold archive
+        
+        Args:
+            point_ids (list): Points to move (ids not found are ignored)
+        
+        Returns:
+            int: Number of points moved
+        """
+        if not point_ids:
+            return 0
+        
+        try:
+            self._ensure_archive()
+            moved = 0
+            for collection_name in self._all_collections():
+                points = self.client.retrieve(
+                    collection_name=collection_name,
+                    ids=list(point_ids),
+                    with_vectors=True,
+                    with_payload=True
+                )
+                if not points:
+                    continue
                 
-                # Apply minimum similarity filter
-                if similarity >= min_similarity:
-                    matches.append({
-                        'post_id': result.payload.get('post_id', result.id),
-                        'similarity': similarity,
-                        'payload': result.payload
-                    })
-                else:
-                    print(f"⚠️  Filtered out: {result.payload.get('title')} - {similarity*100:.1f}% (below {min_similarity*100}%)")
+                # Copy first, then delete - a crash in between leaves a duplicate, never a loss
+                self.client.upsert(
+                    collection_name=self.archive_name,
+                    points=[PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points]
+                )
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=[point.id for point in points]
+                )
+                self._forget_routes([point.id for point in points])
+                moved += len(points)
             
-            print(f"✨ Found {len(matches)} matches above {min_similarity*100}% similarity")
-            return matches
+            if moved:
+                self._bump_version()
+            return moved
+        except Exception as e:
+            raise Exception(f"Failed to archive points: {str(e)}")
+    
+    def delete_embedding(self, point_id, post_type=None, category=None):
+        """
+        Delete an embedding from the vector database
+        
+        Args:
+            point_id (str): Point identifier
+            post_type (str, optional): Post type, routes the delete to one partition
+            category (str, optional): Category, routes the delete to one partition
+        """
+        try:
+            if self.partition_mode == 'collections' and post_type:
+                collections = [self.partition_name(post_type, category)]
+            else:
+                collections = self._all_collections()
             
+            # The post may have been moved to the archive already
+            if self.archive_name in [col.name for col in self.client.get_collections().collections]:
+                collections.append(self.archive_name)
+            
+            for collection_name in collections:
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=[point_id]
+                )
+            self._forget_routes([point_id])
+            self._bump_version()
         except Exception as e:
-            print(f"Search error: {str(e)}")
-            return []
+            raise Exception(f"Failed to delete embedding: {str(e)}")
     
-    def delete_embedding(self, point_id):
-        """Delete an embedding from the vector database"""
+    def is_indexed(self):
+        """
+        Whether any hot collection holds points (a model's collection stays empty until it is reindexed)
+        
+        Once points are seen the answer is cached for good, an empty result is re-checked
+        after PARTITION_LIST_TTL seconds.
+        """
+        if self._indexed or time.time() - self._indexed_checked_at < PARTITION_LIST_TTL:
+            return self._indexed
         try:
-            self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=[point_id]
+            self._indexed = any(
+                self.client.count(collection_name=collection_name, exact=False).count > 0
+                for collection_name in self._all_collections()
             )
         except Exception as e:
-            raise Exception(f"Failed to delete embedding: {str(e)}")
+            print(f"⚠️  Could not count points in {self.collection_name}: {e}")
+        self._indexed_checked_at = time.time()
+        return self._indexed
     
     def get_collection_info(self):
         """Get information about the collection"""
         try:
+            if self.partition_mode == 'collections':
+                partitions = {
+                    name: self.client.get_collection(name).points_count
+                    for name in self._list_partitions()
+                }
+                return {
+                    'name': self.collection_name,
+                    'partitions': partitions,
+                    'points_count': sum(count or 0 for count in partitions.values())
+                }
+            
             info = self.client.get_collection(self.collection_name)
             return {
                 'name': self.collection_name,
@@ -0,0 +1,101 @@
+"""Test the background upload queue (resume, retry, discard) against a local stand-in store"""
+import os
+import shutil
+import tempfile
+import time
+
+from services.upload_queue import LocalObjectStore, RemoteUploadQueue
+
+
+class FlakyStore(LocalObjectStore):
+    """Local store that fails a number of uploads before it starts working"""
+
+    def __init__(self, root, failures=0):
+        super().__init__(root, 'http://localhost:9000')
+        self.failures = failures
+
+    def upload(self, file_path, object_path):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("store unavailable")
+        super().upload(file_path, object_path)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def make_queue(store, spool_dir, **kwargs):
+    options = dict(num_workers=2, max_attempts=2, base_delay=0.01, max_delay=0.02, park_delay=0.2)
+    options.update(kwargs)
+    return RemoteUploadQueue(store, spool_dir, **options)
+
+
+work_dir = tempfile.mkdtemp(prefix='upload_queue_test_')
+source = os.path.join(work_dir, 'source.jpg')
+with open(source, 'wb') as f:
+    f.write(b'not really a jpeg')
+
+failed = []
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        failed.append(name)
+
+
+# 1. Jobs left in the spool by a previous run are uploaded on start
+spool = os.path.join(work_dir, 'spool_resume')
+down = FlakyStore(os.path.join(work_dir, 'bucket_resume'), failures=1000)
+previous_run = make_queue(down, spool, park_delay=3600)
+previous_run.enqueue(source, 'objects/resumed.jpg')
+check("job stays in the spool while the store is down", wait_for(lambda: previous_run.stats()['parked'] == 1))
+
+store = FlakyStore(os.path.join(work_dir, 'bucket_resume'))
+resumed = make_queue(store, spool)
+resumed.start()
+check("spooled job is resumed and uploaded", wait_for(lambda: os.path.exists(store._path('objects/resumed.jpg'))))
+check("spool is empty afterwards", wait_for(lambda: not os.listdir(spool)))
+
+# 2. A job that runs out of attempts is parked and retried on the timer
+spool = os.path.join(work_dir, 'spool_retry')
+store = FlakyStore(os.path.join(work_dir, 'bucket_retry'), failures=3)
+uploaded = []
+retrying = make_queue(store, spool, on_uploaded=uploaded.append)
+retrying.enqueue(source, 'objects/retried.jpg')
+check("failed job is parked", wait_for(lambda: retrying.stats()['parked'] == 1))
+check("parked job is uploaded on a later round", wait_for(lambda: uploaded == ['objects/retried.jpg']))
+check("parked counter drops back to 0", retrying.stats()['parked'] == 0)
+
+# 3. Discarding drops queued, parked and resumed jobs
+spool = os.path.join(work_dir, 'spool_discard')
+store = FlakyStore(os.path.join(work_dir, 'bucket_discard'), failures=1000)
+discarding = make_queue(store, spool, park_delay=3600)
+discarding.enqueue(source, 'objects/parked.jpg')
+wait_for(lambda: discarding.stats()['parked'] == 1)
+discarding.discard('objects/parked.jpg')
+check("discarded parked job leaves the spool", wait_for(lambda: not os.listdir(spool)))
+
+previous_run = make_queue(store, spool, park_delay=3600)
+previous_run.enqueue(source, 'objects/left_over.jpg')
+wait_for(lambda: previous_run.stats()['parked'] == 1)
+store.failures = 1  # First attempt fails, the discard lands during the backoff
+restarted = make_queue(store, spool, base_delay=0.5, max_delay=0.5)
+restarted.discard('objects/left_over.jpg')  # Not started yet - nothing is tracked
+restarted.start()
+restarted.discard('objects/left_over.jpg')
+check("resumed job can be discarded", wait_for(lambda: not os.listdir(spool)))
+check("discarded job is never uploaded", not os.path.exists(store._path('objects/left_over.jpg')))
+
+print()
+if failed:
+    print(f"❌ {len(failed)} check(s) failed (files in {work_dir})")
+    exit(1)
+shutil.rmtree(work_dir, ignore_errors=True)
+print("✅ All upload queue checks passed")